@@ -0,0 +1,76 @@
+import base64
+import hashlib
+import io
+import os
+import threading
+
+from PIL import Image # Make sure to install this: pip install pillow
+
+THUMBNAIL_SIZE = (160, 160) # Largest preview shown in a find_image node
+HASH_CHUNK_SIZE = 1 << 20
+
+
+# --- Image Asset Store ---
+class AssetStore:
+    """
+    Image previews keyed by the SHA-256 of the image's content. Each distinct
+    image gets one small PNG thumbnail on disk, made once and shared by every
+    node and path that refers to the same pixels. The editor only receives
+    these thumbnails; find_image still matches against the original file.
+    """
+    def __init__(self, root, thumbnail_size=THUMBNAIL_SIZE):
+        self.thumbnail_dir = os.path.join(root, 'thumbnails')
+        os.makedirs(self.thumbnail_dir, exist_ok=True)
+        self.thumbnail_size = thumbnail_size
+        self._hashes = {} # path -> (mtime, size, content hash)
+        self._previews = {} # content hash -> thumbnail data URL
+        self._lock = threading.Lock()
+
+    def content_hash(self, path):
+        """ Returns the image's content hash. Only re-reads the file when it has changed. """
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._hashes.get(path)
+        if entry and entry[0] == stat.st_mtime and entry[1] == stat.st_size:
+            return entry[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+        with self._lock:
+            self._hashes[path] = (stat.st_mtime, stat.st_size, content_hash)
+        return content_hash
+
+    def thumbnail_path(self, content_hash):
+        return os.path.join(self.thumbnail_dir, f"{content_hash}.png")
+
+    def preview(self, path):
+        """ Returns a small PNG data URL previewing the image at path. """
+        content_hash = self.content_hash(path)
+        with self._lock:
+            data_url = self._previews.get(content_hash)
+            if data_url:
+                return data_url
+
+            thumbnail_path = self.thumbnail_path(content_hash)
+            if not os.path.exists(thumbnail_path):
+                self._write_thumbnail(path, thumbnail_path)
+            with open(thumbnail_path, 'rb') as f:
+                data_url = f"data:image/png;base64,{base64.b64encode(f.read()).decode('utf-8')}"
+            self._previews[content_hash] = data_url
+            return data_url
+
+    def _write_thumbnail(self, source_path, thumbnail_path):
+        with Image.open(source_path) as image:
+            if image.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            image.thumbnail(self.thumbnail_size)
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG', optimize=True)
+        # Written under a temporary name, so a crash never leaves a half-written thumbnail.
+        temp_path = f"{thumbnail_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(buffer.getvalue())
+        os.replace(temp_path, thumbnail_path)
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import numpy as np # Make sure to install this: pip install numpy
+
+from backend.vision import to_grayscale
+
+
+# --- Capture Backends ---
+class PyAutoGuiCaptureBackend:
+    """ Grabs the primary screen through pyautogui. """
+    static = False # The screen can change between grabs
+
+    def grab(self):
+        import pyautogui
+        return np.asarray(pyautogui.screenshot())
+
+
+class SyntheticCaptureBackend:
+    """
+    Serves prepared frames instead of reading the screen, for tests and
+    benchmarks. Takes a list of arrays (returned in turn, repeating the last)
+    or a function that returns the next frame.
+    """
+    def __init__(self, frames):
+        self.frames = frames
+        self.index = 0
+
+    @property
+    def static(self):
+        """ True once every later grab returns the same frame. """
+        return not callable(self.frames) and self.index >= len(self.frames) - 1
+
+    def grab(self):
+        if callable(self.frames):
+            return self.frames()
+        frame = self.frames[min(self.index, len(self.frames) - 1)]
+        self.index += 1
+        return frame
+
+
+# --- Shared Screen Capture ---
+class Frame:
+    """ One captured screen image, with its grayscale version made on demand. """
+    def __init__(self, pixels, timestamp):
+        self.pixels = pixels
+        self.timestamp = timestamp
+        self._gray = None
+        self._gray_regions = {} # region -> luminance of just that region
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            self._gray = to_grayscale(self.pixels)
+        return self._gray
+
+    def gray_region(self, region):
+        """ Returns a region as luminance, converting only that region unless the whole frame already is. """
+        if region is None or self._gray is not None:
+            return ScreenCapture.crop(self.gray, region)
+        gray = self._gray_regions.get(region)
+        if gray is None:
+            gray = self._gray_regions[region] = to_grayscale(ScreenCapture.crop(self.pixels, region))
+        return gray
+
+
+class ScreenCapture:
+    """
+    Screen capture shared by every screen-reading node of a runner. A frame is
+    reused while it is younger than max_age seconds, so several checks in the
+    same loop pass cost one capture. Regions are returned as NumPy views into
+    the frame, never copies.
+    """
+    DEFAULT_MAX_AGE = 0.05 # Seconds; one frame at 20 fps
+
+    def __init__(self, backend=None, max_age=DEFAULT_MAX_AGE):
+        self.backend = backend or PyAutoGuiCaptureBackend()
+        self.max_age = max_age
+        self._frame = None
+        self._lock = threading.Lock()
+
+        # Latency counters, reported by stats().
+        self.capture_count = 0
+        self.reuse_count = 0
+        self.total_capture_time = 0.0
+        self.max_capture_time = 0.0
+
+    def frame(self):
+        """ Returns the current frame, capturing a new one if the cached one is too old. """
+        with self._lock:
+            now = time.perf_counter()
+            if self._frame is not None and (self.static or now - self._frame.timestamp <= self.max_age):
+                self.reuse_count += 1
+                return self._frame
+
+            pixels = self.backend.grab()
+            elapsed = time.perf_counter() - now
+            self.capture_count += 1
+            self.total_capture_time += elapsed
+            self.max_capture_time = max(self.max_capture_time, elapsed)
+            self._frame = Frame(pixels, now + elapsed)
+            return self._frame
+
+    def grab(self, region=None):
+        """ Returns the screen (or a (left, top, width, height) region of it) as pixels. """
+        return self.crop(self.frame().pixels, region)
+
+    def grab_gray(self, region=None):
+        """ Like grab(), but as float32 luminance for matching. """
+        return self.frame().gray_region(region)
+
+    @property
+    def static(self):
+        """ True if the screen can no longer change, e.g. in a dry run. """
+        return self.backend.static
+
+    def invalidate(self):
+        """ Forces the next grab to capture a fresh frame. """
+        if self.static:
+            return # A fresh capture would be the same frame
+        with self._lock:
+            self._frame = None
+
+    @staticmethod
+    def crop(pixels, region):
+        """
+        Returns a view of a region of an image, clipped to its bounds. The view
+        starts at (max(left, 0), max(top, 0)) in the image.
+        """
+        if region is None:
+            return pixels
+        left, top, width, height = region
+        # Clip the far edges before the near ones, so a region hanging off the
+        # top or left loses that part instead of shifting onto the screen.
+        right, bottom = max(left + width, 0), max(top + height, 0)
+        left, top = max(left, 0), max(top, 0)
+        return pixels[top:bottom, left:right]
+
+    def stats(self):
+        """ Returns the capture counters in milliseconds. """
+        return {
+            'captures': self.capture_count,
+            'reused': self.reuse_count,
+            'avg_capture_ms': (self.total_capture_time / self.capture_count * 1000) if self.capture_count else 0.0,
+            'max_capture_ms': self.max_capture_time * 1000,
+        }
@@ -0,0 +1,965 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from backend.capture import ScreenCapture
+from backend.governor import ExecutionGovernor
+from backend.input import create_input_backend, parse_keys
+from backend.scheduler import AdaptivePoller, FixedRateTimer, Scheduler
+from backend.storage import MacroStorage, macro_from_canvas
+from backend.trace import NullTrace, TraceChannel
+from backend.vision import find_color, find_template, mean_difference, parse_color, template_cache
+
+
+# --- Macro Compilation ---
+class MacroPlan:
+    """
+    A macro compiled into lookup tables. Built once per run so the interpreter
+    never has to scan the connection list while it is executing.
+    """
+    def __init__(self, macro_data, handler_table, evaluator_table):
+        self.start_node_id = macro_data.get('start_node_id')
+        self.nodes = {node['id']: node for node in macro_data['nodes']}
+
+        # (node id, output pin) -> id of the next node on that exec wire.
+        self.exec_edges = {}
+        # (node id, input pin) -> (source node id, source output pin).
+        self.data_edges = {}
+        for conn in macro_data['connections']:
+            if conn.get('flow') == 'exec':
+                # Keep the first wire for a pin, matching the old linear scan.
+                self.exec_edges.setdefault((conn['startNodeId'], conn['startPinName']), conn['endNodeId'])
+            elif conn.get('flow') == 'data':
+                self.data_edges.setdefault((conn['endNodeId'], conn['endPinName']), (conn['startNodeId'], conn['startPinName']))
+
+        # node id -> the function that executes it, resolved from the node type.
+        self.handlers = {
+            node_id: handler_table.get(node.get('type'))
+            for node_id, node in self.nodes.items()
+        }
+
+        # node id -> the function that computes it, for pure data nodes only.
+        self.evaluators = {}
+        for node_id, node in self.nodes.items():
+            evaluator = evaluator_table.get(node.get('type'))
+            if evaluator:
+                self.evaluators[node_id] = evaluator
+
+        # Data dependencies in both directions, used to order evaluation and
+        # to find what a changed output invalidates.
+        self.data_inputs = {}
+        self.data_consumers = {}
+        for (end_node_id, _), (start_node_id, _) in self.data_edges.items():
+            self.data_inputs.setdefault(end_node_id, []).append(start_node_id)
+            self.data_consumers.setdefault(start_node_id, []).append(end_node_id)
+        self._downstream = {}
+
+    def next_node(self, node_id, pin_name):
+        """ Returns the node wired to an exec output pin, or None. """
+        return self.exec_edges.get((node_id, pin_name))
+
+    def data_source(self, node_id, pin_name):
+        """ Returns the (node id, pin name) feeding a data input pin, or None. """
+        return self.data_edges.get((node_id, pin_name))
+
+    def downstream(self, node_id):
+        """ Returns every pure data node that depends, directly or not, on a node. """
+        dependents = self._downstream.get(node_id)
+        if dependents is None:
+            dependents = set()
+            pending = [node_id]
+            while pending:
+                for consumer in self.data_consumers.get(pending.pop(), ()):
+                    if consumer in self.evaluators and consumer not in dependents:
+                        dependents.add(consumer)
+                        pending.append(consumer)
+            self._downstream[node_id] = dependents
+        return dependents
+
+
+class MacroPlanCache:
+    """
+    Compiled sub-macros for Call Macro nodes, keyed by file path and Start
+    node. An entry is reused while the file and its autosave journal are
+    unchanged. Files are checked at most once per recheck_interval, so calls
+    in a tight loop neither touch the disk nor re-parse JSON.
+    """
+    def __init__(self, max_entries=16, recheck_interval=1.0):
+        self.max_entries = max_entries
+        self.recheck_interval = recheck_interval
+        self._entries = OrderedDict() # (path, start node id) -> [file signature, checked at, macro data, plan]
+        self._lock = threading.Lock()
+
+    def get(self, path, start_node_id, handler_table, evaluator_table):
+        """ Returns (macro data, MacroPlan) for a Start node in a saved macro file. """
+        key = (os.path.abspath(path), start_node_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.recheck_interval:
+                self._entries.move_to_end(key)
+                return entry[2], entry[3]
+
+        signature = MacroStorage.signature(path)
+        if entry and entry[0] == signature:
+            self._store(key, entry, now) # Still in use, so it is the most recent again
+            return entry[2], entry[3]
+
+        macro_data = macro_from_canvas(MacroStorage().load(path), start_node_id)
+        plan = MacroPlan(macro_data, handler_table, evaluator_table)
+        self._store(key, [signature, now, macro_data, plan], now)
+        return macro_data, plan
+
+    def _store(self, key, entry, checked_at):
+        """ Makes an entry the most recently used one, evicting the oldest past max_entries. """
+        with self._lock:
+            entry[1] = checked_at
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Shared across runs so a called macro is loaded and compiled once per file version.
+macro_plan_cache = MacroPlanCache()
+
+
+class PreparedMacroCache:
+    """
+    Compiled macros of the open canvas, keyed by Start node id and checked
+    against a hash of their content. The editor sends its hotkeyed macros
+    whenever the canvas changes and only those whose hash changed are
+    compiled again, so a hotkey can start its macro straight from here
+    instead of asking the editor to serialize it.
+    """
+    def __init__(self, handler_table, evaluator_table):
+        self.handler_table = handler_table
+        self.evaluator_table = evaluator_table
+        self._entries = {} # start node id -> (content hash, macro data, plan)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(macro_data):
+        encoded = json.dumps(macro_data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def update(self, macros):
+        """ Replaces the prepared macros with a list of macro data. Returns what had to be recompiled. """
+        entries, compiled = {}, 0
+        with self._lock:
+            previous = self._entries
+        for macro_data in macros:
+            start_node_id = macro_data.get('start_node_id')
+            content_hash = self.content_hash(macro_data)
+            entry = previous.get(start_node_id)
+            if not entry or entry[0] != content_hash:
+                entry = (content_hash, macro_data, MacroPlan(macro_data, self.handler_table, self.evaluator_table))
+                compiled += 1
+            entries[start_node_id] = entry
+        with self._lock:
+            self._entries = entries
+        return {'prepared': len(entries), 'compiled': compiled}
+
+    def get(self, start_node_id):
+        """ Returns (macro data, plan) for a prepared macro, or None. """
+        with self._lock:
+            entry = self._entries.get(start_node_id)
+        return entry[1:] if entry else None
+
+    def prepare(self, macro_data):
+        """ Returns the plan for macro data, reusing the prepared one if the content matches. """
+        start_node_id = macro_data.get('start_node_id')
+        content_hash = self.content_hash(macro_data)
+        with self._lock:
+            entry = self._entries.get(start_node_id)
+        if entry and entry[0] == content_hash:
+            return entry[2]
+        plan = MacroPlan(macro_data, self.handler_table, self.evaluator_table)
+        with self._lock:
+            self._entries[start_node_id] = (content_hash, macro_data, plan)
+        return plan
+
+# Shared by every runner, so macros running in parallel never interleave
+# their input actions (e.g. one macro's keys landing inside another's combo).
+input_lock = threading.Lock()
+
+
+# --- Macro Execution Engine ---
+class MacroRunner:
+    INPUT_NODE_TYPES = {'mouse_click', 'mouse_move', 'mouse_scroll', 'key_press', 'type_string'}
+    NODE_STEP_DELAY = 0.05 # Pause after each node in normal mode
+    RELOOP_DELAY = 0.1 # Pause between passes of a continuously looping macro
+    MAX_INPUT_BATCH = 256 # Queued input actions sent at most this many at a time
+    MOVE_STEP_INTERVAL = 1 / 120 # Cursor update interval for moves with a duration
+    UNICODE_CHUNK_SIZE = 64 # Characters sent per call in Unicode typing mode
+    PASTE_SETTLE_DELAY = 0.15 # Time the target gets to read the clipboard before it is restored
+    MAX_CALL_DEPTH = 16 # Nested Call Macro limit, which catches a macro calling itself
+    # Data pins passed into and out of a called macro: (pin name, type, default).
+    MACRO_ARGUMENTS = (('Number 1', 'number', 0), ('Number 2', 'number', 0), ('Text 1', 'string', ""), ('Text 2', 'string', ""))
+    MACRO_RESULTS = (('Number Result', 'number', 0), ('Text Result', 'string', ""))
+
+    def __init__(self, macro_data, window, trace=None, capture=None, input_backend=None, profiler=None,
+                 plan=None, scheduler=None, call_depth=0, capture_max_age=ScreenCapture.DEFAULT_MAX_AGE):
+        self.macro_data = macro_data
+        self.window = window
+        self.trace = trace or TraceChannel(window, macro_data.get('start_node_id'))
+        self.scheduler = scheduler or Scheduler() # Shared with called macros, so stop() wakes them too
+        # Shared by all screen-reading nodes; capture_max_age is how long a frame is reused.
+        self.capture = capture or ScreenCapture(max_age=capture_max_age)
+        self.input = input_backend or create_input_backend() # See backend/input.py
+        self._pending_input = [] # Input actions queued for the next batched dispatch
+        self.input_count = 0 # Input actions sent or queued; progress for the governor
+        self.profiler = profiler
+        self.is_running = False
+        self.error = None # Why the run stopped early, if a node failed
+        self.turbo = False # Set from the Start node when the run begins
+        self.plan = plan or MacroPlan(macro_data, self.EXEC_HANDLERS, self.DATA_EVALUATORS)
+        self.call_depth = call_depth # How many Call Macro nodes deep this runner is
+        self.returned = False # Set by a Return node; ends the current pass
+        self.return_values = {}
+        self._child = None # Runner of the macro a Call Macro node is running
+        self.nodes = self.plan.nodes
+        self.node_outputs = {} # Stores dynamic outputs from nodes like loop index
+        self.value_cache = {} # Memoized results of pure data nodes for this run
+        self._evaluating = set() # Data nodes whose inputs are still being resolved
+        # Throttles loops that neither send input nor wait. See backend/governor.py.
+        self.governor = ExecutionGovernor(self.scheduler, lambda: self.input_count + self.scheduler.sleep_count,
+                                          on_change=self.trace.status)
+        if profiler is not None:
+            self._enable_profiling(profiler)
+
+    def _enable_profiling(self, profiler):
+        """
+        Wraps node execution with a timer. Done per instance, so runs without a
+        profiler don't pay for it at all. Data nodes are timed where they are
+        computed, in _evaluate_data_node.
+        """
+        execute_node = self.execute_node
+
+        def profiled_execute_node(node):
+            start = time.perf_counter()
+            try:
+                return execute_node(node)
+            finally:
+                profiler.record('node', node.get('id'), node.get('type'), start, time.perf_counter())
+
+        self.execute_node = profiled_execute_node
+
+    def stop(self):
+        self.is_running = False
+        self.scheduler.cancel()
+        child = self._child
+        if child:
+            child.stop()
+        self.trace.clear()
+        print("Macro execution stopped by user.")
+
+    def run(self):
+        # The entire run process is wrapped in a try...finally block
+        # to ensure cleanup happens.
+        try:
+            self.is_running = True
+            # Stopped while still queued: stop() has already cancelled the
+            # scheduler, so every sleep would return at once.
+            if self.scheduler.cancelled:
+                return
+            print("Starting macro execution...")
+            self.trace.start()
+            self.trace.clear()
+
+            start_node_id = self.plan.start_node_id
+            if not start_node_id:
+                print("Error: No start_node_id provided.")
+                return
+
+            start_node = self.nodes.get(start_node_id)
+            if not start_node:
+                print(f"Error: Start node {start_node_id} not found.")
+                return
+
+            start_values = start_node.get('values', {})
+            should_loop = start_values.get('Loop Continuously', False)
+            # Turbo mode skips the pacing sleeps; the editor still follows
+            # along through the trace channel.
+            self.turbo = bool(start_values.get('Turbo Mode', False))
+            self.governor.configure(start_values.get('Loop Guard', 'adaptive'),
+                                    self.get_input_value(start_node_id, 'Max Idle Rate', 'number', 1000))
+
+            # If the macro is not set to loop, just run the execution path once.
+            if not should_loop:
+                self.run_pass(start_node_id)
+            elif start_values.get('Loop Timing') == 'fixed_rate':
+                # Start each pass on a fixed schedule, e.g. exactly 10 per second.
+                rate = self.get_input_value(start_node_id, 'Rate', 'number', 1)
+                timer = FixedRateTimer(self.scheduler, rate if rate > 0 else 1)
+                while self.is_running:
+                    self.run_pass(start_node_id)
+                    if self.is_running:
+                        timer.wait()
+            else:
+                # If looping, continue executing the path until stopped.
+                while self.is_running:
+                    self.run_pass(start_node_id)
+                    # If the macro was stopped during execution, don't sleep.
+                    if self.is_running and not self.turbo:
+                        self.scheduler.sleep(self.RELOOP_DELAY)
+                    self.governor.iteration()
+
+        finally:
+            print("Macro execution finished.")
+            self.is_running = False
+            self.governor.finish()
+            self.trace.clear()
+            self.trace.close()
+
+    def run_pass(self, start_node_id):
+        """ Executes the macro once from its start node and sends any queued input. """
+        self.returned = False
+        self.execute_path(start_node_id)
+        self.flush_input()
+
+    def execute_path(self, start_node_id):
+        """ Executes a chain of nodes starting from a given node ID. """
+        current_node_id = start_node_id
+        while current_node_id and self.is_running and not self.returned:
+            node = self.nodes.get(current_node_id)
+            if not node:
+                print(f"Error: Node {current_node_id} not found in execution path.")
+                break
+
+            self.trace.highlight(current_node_id)
+            self.governor.node_executed()
+
+            # The 'start' node doesn't have an action, it just directs flow.
+            # For all other nodes, execute their action and determine the next path.
+            next_pin_name = 'exec'
+            if node.get('type') != 'start':
+                next_pin_name = self.execute_node(node)
+
+            if not self.turbo:
+                self.scheduler.sleep(self.NODE_STEP_DELAY)
+
+            if not self.is_running:
+                break
+
+            # Follow the wire leaving the output pin chosen by the executed node.
+            current_node_id = self.plan.next_node(current_node_id, next_pin_name)
+
+    def get_input_value(self, current_node_id, pin_name, expected_type, default_value=None):
+        """
+        Gets the value for a data input pin, either from a connection or
+        from the node's default value.
+        """
+        # Find if this input pin is connected to another node's output.
+        source = self.plan.data_source(current_node_id, pin_name)
+
+        value = None
+        if source:
+            # If connected, evaluate (or reuse) the source node's output pin.
+            value = self.evaluate_output_pin(*source)
+
+        # If not connected, or if the connected node returned None, use the default.
+        if value is None:
+            node = self.nodes.get(current_node_id)
+            value = node.get('values', {}).get(pin_name, default_value)
+
+
+        # Coerce the value to the type expected by the pin.
+        if value is None:
+            if expected_type == 'number': return 0
+            if expected_type == 'string': return ""
+            if expected_type == 'boolean': return False
+            return None
+
+        try:
+            if expected_type == 'number': return float(value)
+            if expected_type == 'string': return str(value)
+            if expected_type == 'boolean':
+                if isinstance(value, bool):
+                    return value
+                if isinstance(value, str):
+                    val_lower = value.strip().lower()
+                    if val_lower in ['true', '1', 't', 'y', 'yes']:
+                        return True
+                    if val_lower in ['false', '0', 'f', 'n', 'no']:
+                        return False
+                if isinstance(value, (int, float)):
+                    return value != 0
+                return False # Default to false if type is ambiguous
+            return value # Return original value if type not matched
+        except (ValueError, TypeError):
+            # Fallback to a sensible default if casting fails.
+            if expected_type == 'number': return 0
+            if expected_type == 'string': return ""
+            if expected_type == 'boolean': return False
+        return None
+
+    def set_node_outputs(self, node_id, outputs):
+        """
+        Publishes the dynamic outputs of an execution node (e.g., loop index)
+        and drops the cached values of every data node computed from them.
+        """
+        self.node_outputs[node_id] = outputs
+        for dependent_id in self.plan.downstream(node_id):
+            self.value_cache.pop(dependent_id, None)
+
+    def evaluate_output_pin(self, node_id, pin_name):
+        """
+        Evaluates the value of a data output pin. This is used for data nodes
+        (like Math, Compare) and for nodes that generate data during execution (like Loops).
+        """
+        node = self.nodes.get(node_id)
+        if not node: return None
+
+        # Check for dynamic data generated by an execution node (e.g., loop index).
+        if node_id in self.node_outputs and pin_name in self.node_outputs[node_id]:
+            return self.node_outputs[node_id][pin_name]
+
+        # Pure data nodes are computed once and reused until an input changes.
+        if node_id not in self.plan.evaluators:
+            return None
+        if node_id in self.value_cache:
+            return self.value_cache[node_id]
+        if node_id in self._evaluating:
+            print(f"Error: Data cycle detected at node {node_id}.")
+            return None
+        return self._evaluate_data_node(node_id)
+
+    def _evaluate_data_node(self, node_id):
+        """
+        Computes a pure data node and any uncached data nodes it depends on.
+        Uses an explicit stack so chains deeper than the recursion limit work.
+        """
+        evaluators = self.plan.evaluators
+        cache = self.value_cache
+        profiler = self.profiler
+        stack = [(node_id, False)]
+        while stack:
+            current_id, inputs_ready = stack.pop()
+            if current_id in cache:
+                continue
+            if inputs_ready:
+                # Every upstream data node is cached now, so reading the
+                # inputs below never recurses more than one level.
+                self._evaluating.discard(current_id)
+                node = self.nodes[current_id]
+                if profiler is None:
+                    cache[current_id] = evaluators[current_id](self, node)
+                    continue
+                # Timed per node, so each upstream node's compute is recorded
+                # under its own id rather than under the node that needed it.
+                start = time.perf_counter()
+                try:
+                    cache[current_id] = evaluators[current_id](self, node)
+                finally:
+                    profiler.record('data', current_id, node.get('type'), start, time.perf_counter())
+                continue
+            if current_id in self._evaluating:
+                continue
+            self._evaluating.add(current_id)
+            stack.append((current_id, True))
+            for source_id in self.plan.data_inputs.get(current_id, ()):
+                if source_id in evaluators and source_id not in cache and source_id not in self._evaluating:
+                    stack.append((source_id, False))
+        return cache.get(node_id)
+
+    def execute_node(self, node):
+        node_type = node.get('type')
+        node_id = node.get('id')
+        print(f"Executing node: {node_id} ({node_type})")
+
+        next_exec_pin = 'exec' # Default for simple nodes
+
+        try:
+            if not self.is_running: return None
+
+            handler = self.plan.handlers.get(node_id)
+            if handler and node_type not in self.INPUT_NODE_TYPES:
+                # Other nodes may wait or read the screen, so queued input goes out first.
+                self.flush_input()
+            if handler:
+                next_exec_pin = handler(self, node)
+
+        except Exception as e:
+            self.error = f"Error executing node {node_id}: {e}"
+            print(self.error)
+            self.stop()
+
+        return next_exec_pin
+
+    # --- Node Handlers ---
+    # Each handler performs a node's action and returns the name of the
+    # exec output pin to follow next.
+
+    def _exec_delay(self, node):
+        node_id = node['id']
+        values = node.get('values', {})
+        duration = self.get_input_value(node_id, 'Duration', 'number', 1)
+        unit = values.get('Unit', 'seconds')
+        if unit == 'milliseconds':
+            duration /= 1000.0
+        elif unit == 'minutes':
+            duration *= 60
+
+        # Returns early if the macro is stopped while waiting.
+        self.scheduler.sleep(duration)
+        return 'exec'
+
+    def _exec_mouse_click(self, node):
+        node_id = node['id']
+        values = node.get('values', {})
+        button = values.get('Button', 'left').lower()
+        action = values.get('Action', 'click')
+        if action == 'hold':
+            duration = self._get_duration(node_id, 'Duration', values.get('Unit', 'seconds'), 0.5)
+            self._hold([('mouse_down', button)], [('mouse_up', button)], duration)
+        else:
+            self.queue_input('click', button, 2 if action == 'double_click' else 1)
+        return 'exec'
+
+    def _exec_mouse_move(self, node):
+        node_id = node['id']
+        values = node.get('values', {})
+        x_pos = int(self.get_input_value(node_id, 'X', 'number', 0))
+        y_pos = int(self.get_input_value(node_id, 'Y', 'number', 0))
+        duration = self._get_duration(node_id, 'Duration', values.get('Unit', 'seconds'), 0.25)
+        if duration <= 0:
+            self.queue_input('move_to', x_pos, y_pos)
+            return 'exec'
+
+        # Glide in small steps on the scheduler's clock, so a stop cuts it short.
+        self.flush_input()
+        start_x, start_y = self.input.position()
+        steps = max(int(duration / self.MOVE_STEP_INTERVAL), 1)
+        started = self.scheduler.now()
+        for step in range(1, steps + 1):
+            if not self.is_running:
+                break
+            progress = step / steps
+            self._send('move_to', round(start_x + (x_pos - start_x) * progress), round(start_y + (y_pos - start_y) * progress))
+            if step < steps:
+                self.scheduler.sleep_until(started + duration * progress)
+        return 'exec'
+
+    def _exec_mouse_scroll(self, node):
+        node_id = node['id']
+        amount = self.get_input_value(node_id, 'Amount', 'number', 100)
+        if node.get('values', {}).get('Direction', 'down') == 'down':
+            amount = -amount
+        self.queue_input('scroll', amount)
+        return 'exec'
+
+    def _exec_key_press(self, node):
+        values = node.get('values', {})
+        keys = parse_keys(values.get('Key', {}).get('pynput', ''))
+        if not keys:
+            return 'exec'
+
+        if values.get('Action', 'press') == 'hold':
+            duration = self._get_duration(node['id'], 'Duration', values.get('Unit', 'seconds'), 0.5)
+            self._hold([('key_down', key) for key in keys], [('key_up', key) for key in reversed(keys)], duration)
+        elif len(keys) == 1:
+            self.queue_input('press', keys[0])
+        else:
+            self.queue_input('hotkey', *keys)
+        return 'exec'
+
+    def _exec_type_string(self, node):
+        node_id = node['id']
+        values = node.get('values', {})
+        text_to_type = self.get_input_value(node_id, 'Text', 'string', "")
+        mode = values.get('Mode', 'per_character')
+        if mode == 'paste':
+            self._paste_text(text_to_type)
+            return 'exec'
+        if mode == 'unicode':
+            self._type_unicode(text_to_type)
+            return 'exec'
+
+        delay = self.get_input_value(node_id, 'Delay', 'number', 50)
+        unit = values.get('Unit', 'milliseconds')
+        if unit == 'milliseconds':
+            delay /= 1000.0
+
+        if delay <= 0:
+            self.queue_input('type_text', text_to_type)
+            return 'exec'
+
+        self.flush_input()
+        for char in text_to_type:
+            if not self.is_running:
+                break
+            self._send('type_text', char)
+            self.scheduler.sleep(delay)
+        return 'exec'
+
+    def _paste_text(self, text):
+        """ Pastes text through the clipboard, then puts the previous clipboard text back. """
+        if not text:
+            return
+        self.flush_input()
+        self.input_count += 1
+        # Held throughout, so a parallel macro can't swap the clipboard mid-paste.
+        with input_lock:
+            saved = self.input.get_clipboard()
+            try:
+                self.input.set_clipboard(text)
+                self.input.paste()
+                # The target reads the clipboard after the shortcut arrives. Not
+                # cancellable: restoring early would paste the old contents.
+                self.scheduler.hold(self.PASTE_SETTLE_DELAY)
+            finally:
+                self.input.set_clipboard(saved)
+        self.capture.invalidate()
+
+    def _type_unicode(self, text):
+        """ Types text as unicode key events, a chunk at a time so a stop takes effect quickly. """
+        self.flush_input()
+        for i in range(0, len(text), self.UNICODE_CHUNK_SIZE):
+            if not self.is_running:
+                break
+            self._send('type_unicode', text[i:i + self.UNICODE_CHUNK_SIZE])
+
+    def _get_duration(self, node_id, pin_name, unit, default_value):
+        """ Reads a duration pin and converts it to seconds. """
+        duration = self.get_input_value(node_id, pin_name, 'number', default_value)
+        if unit == 'milliseconds':
+            duration /= 1000.0
+        return duration
+
+    def _hold(self, presses, releases, duration):
+        """
+        Sends the press actions, waits, then sends the release actions. The
+        releases always go out, even when the macro is stopped mid-hold, so no
+        key or button is left stuck down.
+        """
+        self.flush_input()
+        try:
+            for action in presses:
+                self._send(*action)
+            self.scheduler.sleep(duration)
+        finally:
+            for action in releases:
+                self._send(*action)
+
+    # --- Input Dispatch ---
+    # Input nodes queue their actions; the queue is sent in one batch when a
+    # non-input node runs, the pass ends, or it fills up. Outside turbo mode
+    # every action is sent right away, so the editor's pacing is unchanged.
+
+    def queue_input(self, name, *args):
+        """ Queues one input backend call, e.g. queue_input('press', 'a'). """
+        self._pending_input.append((name, args))
+        self.input_count += 1
+        if not self.turbo or len(self._pending_input) >= self.MAX_INPUT_BATCH:
+            self.flush_input()
+
+    def flush_input(self):
+        """ Sends every queued input action in one dispatch. Dropped if the macro was stopped. """
+        actions, self._pending_input = self._pending_input, []
+        if not actions or not self.is_running:
+            return
+        try:
+            with input_lock:
+                self.input.dispatch(actions)
+        except Exception as e:
+            print(f"Error sending input: {e}")
+            self.stop()
+        # The input may have changed the screen; don't reuse the old frame.
+        self.capture.invalidate()
+
+    def _send(self, name, *args):
+        """ Sends one input action immediately, bypassing the queue. """
+        self.input_count += 1
+        with input_lock:
+            getattr(self.input, name)(*args)
+        self.capture.invalidate()
+
+    def _exec_find_image(self, node):
+        node_id = node['id']
+        image_path = node.get('imagePath')
+        if not image_path:
+            print(f"Error: No image selected for node {node_id}.")
+            self.set_node_outputs(node_id, {})
+            return 'Not Found'
+
+        confidence = self.get_input_value(node_id, 'Confidence', 'number', 80) / 100.0
+        region = self._get_search_region(node_id)
+        template = template_cache.get(image_path)
+
+        screen = self.capture.grab_gray(region)
+        match = find_template(screen, template, confidence)
+        if not match:
+            self.set_node_outputs(node_id, {})
+            return 'Not Found'
+
+        # Report the center of the match in screen coordinates.
+        offset_x, offset_y = (max(region[0], 0), max(region[1], 0)) if region else (0, 0)
+        self.set_node_outputs(node_id, {'X': match[0] + offset_x, 'Y': match[1] + offset_y})
+        return 'Found'
+
+    def _get_search_region(self, node_id):
+        """ Returns a node's (left, top, width, height) search region, or None for the whole screen. """
+        width = int(self.get_input_value(node_id, 'Region Width', 'number', 0))
+        height = int(self.get_input_value(node_id, 'Region Height', 'number', 0))
+        if width <= 0 or height <= 0:
+            return None
+        left = int(self.get_input_value(node_id, 'Region X', 'number', 0))
+        top = int(self.get_input_value(node_id, 'Region Y', 'number', 0))
+        return (left, top, width, height)
+
+    def _exec_pixel_color(self, node):
+        node_id = node['id']
+        values = node.get('values', {})
+        try:
+            color = parse_color(self.get_input_value(node_id, 'Color', 'string', '#000000'))
+        except ValueError as e:
+            print(f"Error in node {node_id}: {e}")
+            self.set_node_outputs(node_id, {})
+            return 'Not Found'
+        tolerance = self.get_input_value(node_id, 'Tolerance', 'number', 10)
+        left = int(self.get_input_value(node_id, 'X', 'number', 0))
+        top = int(self.get_input_value(node_id, 'Y', 'number', 0))
+        width = max(int(self.get_input_value(node_id, 'Width', 'number', 1)), 1)
+        height = max(int(self.get_input_value(node_id, 'Height', 'number', 1)), 1)
+        region = (left, top, width, height)
+
+        # 'check' looks once; 'wait' polls until the color shows up or the timeout passes.
+        poller = self._wait_poller(node_id) if values.get('Mode', 'check') == 'wait' else None
+        previous = None
+        while True:
+            if poller:
+                self.capture.invalidate() # Every poll needs a fresh frame
+            pixels = self.capture.grab(region)
+            match = find_color(pixels, color, tolerance)
+            if match or not poller:
+                break
+            changed = previous is not None and mean_difference(previous, pixels) > 0
+            previous = pixels
+            if not poller.wait(changed) or not self.is_running:
+                break
+
+        if not match:
+            self.set_node_outputs(node_id, {})
+            return 'Not Found'
+        self.set_node_outputs(node_id, {'Match X': max(left, 0) + match[0], 'Match Y': max(top, 0) + match[1]})
+        return 'Found'
+
+    def _exec_region_change(self, node):
+        node_id = node['id']
+        values = node.get('values', {})
+        wait_for = values.get('Wait For', 'change')
+        threshold = self.get_input_value(node_id, 'Threshold', 'number', 2)
+        stable_time = self.get_input_value(node_id, 'Stable Time', 'number', 0.5)
+        region = self._get_search_region(node_id)
+        poller = self._wait_poller(node_id)
+
+        # 'change' compares every poll with the first one; 'stable' compares
+        # consecutive polls and finishes once they have matched for stable_time.
+        self.capture.invalidate()
+        reference = self.capture.grab_gray(region)
+        still_since = self.scheduler.now()
+        difference = 0.0
+        done = False
+        # Any movement on screen switches the poller back to its fastest rate. In
+        # 'stable' mode it also polls once the region has been still long enough.
+        while poller.wait(difference > 0, still_since + stable_time if wait_for == 'stable' else None) and self.is_running:
+            self.capture.invalidate()
+            current = self.capture.grab_gray(region)
+            difference = mean_difference(reference, current)
+            if wait_for == 'stable':
+                now = self.scheduler.now()
+                if difference > threshold:
+                    still_since = now
+                elif now - still_since >= stable_time:
+                    done = True
+                    break
+                reference = current
+            elif difference > threshold:
+                done = True
+                break
+
+        self.set_node_outputs(node_id, {'Difference': difference})
+        return 'Done' if done else 'Timed Out'
+
+    def _wait_poller(self, node_id):
+        """ Returns a poller for a waiting node's Timeout pin (seconds; 0 waits forever). """
+        timeout = self.get_input_value(node_id, 'Timeout', 'number', 10)
+        return AdaptivePoller(self.scheduler, timeout if timeout > 0 else None, static=self.capture.static)
+
+    def _exec_loop(self, node): # For Loop
+        node_id = node['id']
+        iterations = int(self.get_input_value(node_id, 'Iterations', 'number', 5))
+        loop_body_id = self.plan.next_node(node_id, 'Loop Body')
+
+        if loop_body_id:
+            for i in range(iterations):
+                if not self.is_running or self.returned: break
+                # Store the current index so it can be accessed by other nodes.
+                self.set_node_outputs(node_id, {'Index': i})
+                # Execute the entire path connected to the 'Loop Body' pin.
+                self.execute_path(loop_body_id)
+
+        # After the loop is done, the next path to follow is 'Completed'.
+        return 'Completed'
+
+    def _exec_while_loop(self, node):
+        node_id = node['id']
+        loop_body_id = self.plan.next_node(node_id, 'Loop Body')
+
+        if loop_body_id:
+            # Loop as long as the condition is true and the macro is running.
+            while self.get_input_value(node_id, 'Condition', 'boolean', False) and self.is_running and not self.returned:
+                self.execute_path(loop_body_id)
+                self.governor.iteration()
+
+        return 'Completed'
+
+    def _exec_call_macro(self, node):
+        node_id = node['id']
+        macro_path = node.get('macroPath')
+        if not macro_path:
+            print(f"Error: No macro file selected for node {node_id}.")
+            self.set_node_outputs(node_id, {})
+            return 'exec'
+        if self.call_depth >= self.MAX_CALL_DEPTH:
+            raise RuntimeError(f"Macro calls are nested more than {self.MAX_CALL_DEPTH} deep. Does a macro call itself?")
+
+        start_node_id = node.get('values', {}).get('Start Node') or None
+        macro_data, plan = macro_plan_cache.get(macro_path, start_node_id, self.EXEC_HANDLERS, self.DATA_EVALUATORS)
+        arguments = {name: self.get_input_value(node_id, name, pin_type, default) for name, pin_type, default in self.MACRO_ARGUMENTS}
+
+        child = type(self)(macro_data, self.window, trace=NullTrace(), capture=self.capture, input_backend=self.input,
+                           profiler=self.profiler, plan=plan, scheduler=self.scheduler, call_depth=self.call_depth + 1)
+        self._child = child
+        try:
+            if not self.is_running:
+                return None
+            results = child.run_subroutine(arguments, self.turbo)
+        finally:
+            self._child = None
+            self.input_count += child.input_count # Input sent by the called macro counts as this loop's progress
+
+        # A called macro stops on errors; the caller stops with it.
+        if not child.is_running:
+            if self.is_running:
+                self.error = child.error
+                self.stop()
+            return None
+        self.set_node_outputs(node_id, {name: results.get(name, default) for name, _, default in self.MACRO_RESULTS})
+        return 'exec'
+
+    def run_subroutine(self, arguments, turbo):
+        """
+        Runs this runner's macro once on behalf of a Call Macro node in
+        another runner. Returns the values given to its Return node.
+        """
+        self.is_running = True
+        self.turbo = turbo
+        for node_id, node in self.nodes.items():
+            if node.get('type') == 'macro_input':
+                self.set_node_outputs(node_id, arguments)
+        self.run_pass(self.plan.start_node_id)
+        return self.return_values
+
+    def _exec_macro_return(self, node):
+        node_id = node['id']
+        self.return_values = {name: self.get_input_value(node_id, name, pin_type, default) for name, pin_type, default in self.MACRO_RESULTS}
+        self.returned = True
+        return None
+
+    def _exec_if_statement(self, node):
+        condition = self.get_input_value(node['id'], 'Condition', 'boolean', False)
+        return 'True' if condition else 'False'
+
+    # --- Data Node Evaluators ---
+    # Each evaluator computes the output of a pure data node from its inputs.
+
+    def _eval_number_literal(self, node):
+        return self.get_input_value(node['id'], 'value', 'number', 0)
+
+    def _eval_string_literal(self, node):
+        return self.get_input_value(node['id'], 'value', 'string', "")
+
+    def _eval_math(self, node):
+        node_id = node['id']
+        values = node.get('values', {})
+        val_a = self.get_input_value(node_id, 'A', 'number', 0)
+        val_b = self.get_input_value(node_id, 'B', 'number', 0)
+        operator = values.get('Operator', 'add')
+        if operator == 'add':
+            return val_a + val_b
+        elif operator == 'subtract':
+            return val_a - val_b
+        elif operator == 'multiply':
+            return val_a * val_b
+        elif operator == 'divide':
+            return val_a / val_b if val_b != 0 else 0
+        return 0 # Default return for math node
+
+    def _eval_compare(self, node):
+        node_id = node['id']
+        values = node.get('values', {})
+        op_type = values.get('Type', 'number')
+        operator = values.get('Operator', '==').strip()
+        result = False # Default to False
+
+        try:
+            if op_type == 'number':
+                val_a = self.get_input_value(node_id, 'A', 'number', 0)
+                val_b = self.get_input_value(node_id, 'B', 'number', 0)
+
+                if operator == '==': result = (val_a == val_b)
+                elif operator == '!=': result = (val_a != val_b)
+                elif operator == '>': result = (val_a > val_b)
+                elif operator == '<': result = (val_a < val_b)
+                elif operator == '>=': result = (val_a >= val_b)
+                elif operator == '<=': result = (val_a <= val_b)
+
+            elif op_type == 'string':
+                val_a = self.get_input_value(node_id, 'A', 'string', "")
+                val_b = self.get_input_value(node_id, 'B', 'string', "")
+
+                if operator == '==': result = (val_a == val_b)
+                elif operator == '!=': result = (val_a != val_b)
+                elif operator == 'contains': result = (val_b in val_a)
+                elif operator == 'starts_with': result = val_a.startswith(val_b)
+                elif operator == 'ends_with': result = val_a.endswith(val_b)
+
+        except Exception as e:
+            print(f"Error during comparison in node {node_id}: {e}")
+            return False # Explicitly return False on error
+
+        return result
+
+    # Node type -> handler. Resolved per node when the macro is compiled.
+    EXEC_HANDLERS = {
+        'delay': _exec_delay,
+        'mouse_click': _exec_mouse_click,
+        'mouse_move': _exec_mouse_move,
+        'mouse_scroll': _exec_mouse_scroll,
+        'key_press': _exec_key_press,
+        'type_string': _exec_type_string,
+        'find_image': _exec_find_image,
+        'pixel_color': _exec_pixel_color,
+        'region_change': _exec_region_change,
+        'loop': _exec_loop,
+        'while_loop': _exec_while_loop,
+        'if_statement': _exec_if_statement,
+        'call_macro': _exec_call_macro,
+        'macro_return': _exec_macro_return,
+    }
+
+    # Pure data node type -> evaluator. Their results are cached per run.
+    DATA_EVALUATORS = {
+        'number_literal': _eval_number_literal,
+        'string_literal': _eval_string_literal,
+        'math': _eval_math,
+        'compare': _eval_compare,
+    }
+
+
+# The open canvas's macros, ready for hotkeys. Filled in through Api.prepare_macros.
+prepared_macros = PreparedMacroCache(MacroRunner.EXEC_HANDLERS, MacroRunner.DATA_EVALUATORS)
@@ -0,0 +1,120 @@
+GOVERNOR_MODES = ('adaptive', 'cap', 'off')
+
+
+# --- Runaway Loop Governor ---
+class ExecutionGovernor:
+    """
+    Keeps loops that never send input or wait from spinning a core. The
+    runner reports every node it executes and every loop iteration it
+    finishes. An iteration that did not advance `progress` (input sent or
+    time slept) is idle. After idle_threshold idle iterations in a row the
+    governor throttles: 'adaptive' sleeps a little longer on each further
+    idle iteration, up to max_yield, and 'cap' lets idle iterations through
+    at most max_rate times per second. The first input or wait lifts it.
+    """
+    def __init__(self, scheduler, progress, mode='adaptive', max_rate=1000, idle_threshold=1000,
+                 min_yield=0.0001, max_yield=0.01, on_change=None, rate_window=1.0):
+        self.scheduler = scheduler
+        self.progress = progress # Callable; its value changes whenever input is sent or time is slept
+        self.idle_threshold = idle_threshold
+        self.min_yield = min_yield
+        self.max_yield = max_yield
+        self.on_change = on_change # Called with stats() when throttling starts or stops
+        self.rate_window = rate_window
+        self.configure(mode, max_rate)
+
+        # Counters, reported by stats().
+        self.executions = 0
+        self.iterations = 0
+        self.idle_iterations = 0
+        self.throttle_count = 0
+        self.throttle_time = 0.0
+        self.execution_rate = 0.0
+        self.throttled = False
+
+        self._last_progress = progress()
+        self._idle_streak = 0
+        self._yield = 0.0
+        self._next_slot = 0.0
+        self._window_start = scheduler.now()
+        self._window_executions = 0
+
+    def configure(self, mode, max_rate):
+        """ Sets the throttling mode (see GOVERNOR_MODES) and the cap in idle iterations per second. """
+        if mode not in GOVERNOR_MODES:
+            print(f"Unknown loop guard '{mode}', using 'adaptive'.")
+            mode = 'adaptive'
+        self.mode = mode
+        self.period = 1.0 / max_rate if max_rate > 0 else 0.0
+
+    def node_executed(self):
+        self.executions += 1
+
+    def iteration(self):
+        """ Called after each loop iteration. Sleeps if the loop is running away. """
+        self.iterations += 1
+        now = self.scheduler.now()
+        self._update_rate(now)
+
+        progress = self.progress()
+        if progress != self._last_progress:
+            self._last_progress = progress
+            self._idle_streak = 0
+            self._yield = 0.0
+            if self.throttled:
+                self._set_throttled(False)
+            return
+
+        self.idle_iterations += 1
+        self._idle_streak += 1
+        if self.mode == 'off' or self._idle_streak < self.idle_threshold:
+            return
+        if not self.throttled:
+            self._next_slot = now
+            self._set_throttled(True)
+
+        if self.mode == 'cap':
+            # Slots are spaced from the previous one, so a slow iteration is not followed by a burst.
+            self._next_slot = max(self._next_slot + self.period, now)
+            deadline = self._next_slot
+        else:
+            self._yield = min(max(self._yield * 2, self.min_yield), self.max_yield)
+            deadline = now + self._yield
+        self.scheduler.sleep_until(deadline)
+        self.throttle_time += self.scheduler.now() - now
+        # The throttle's own sleep is not progress made by the loop.
+        self._last_progress = self.progress()
+
+    def finish(self):
+        """ Lifts the throttle when the run ends, so the editor stops showing it. """
+        if self.throttled:
+            self._set_throttled(False)
+
+    def _update_rate(self, now):
+        elapsed = now - self._window_start
+        if elapsed >= self.rate_window:
+            self.execution_rate = (self.executions - self._window_executions) / elapsed
+            self._window_start = now
+            self._window_executions = self.executions
+
+    def _set_throttled(self, throttled):
+        self.throttled = throttled
+        if throttled:
+            self.throttle_count += 1
+            print(f"Loop is running without input or waits; throttling ({self.mode}).")
+        if self.on_change:
+            self.on_change(self.stats())
+
+    def stats(self):
+        """ Returns the execution counters. Times are in milliseconds. """
+        self._update_rate(self.scheduler.now())
+        return {
+            'mode': self.mode,
+            'throttled': self.throttled,
+            'executions': self.executions,
+            'executions_per_second': round(self.execution_rate, 1),
+            'iterations': self.iterations,
+            'idle_iterations': self.idle_iterations,
+            'throttle_count': self.throttle_count,
+            'throttle_ms': self.throttle_time * 1000,
+        }
@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+from collections import deque
+
+from backend.profiler import percentile
+
+
+def latency_stats(samples):
+    """ Summarizes latencies given in seconds as count, p50, p99 and max in milliseconds. """
+    samples = sorted(samples)
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        'p50_ms': percentile(samples, 0.5) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'max_ms': samples[-1] * 1000,
+    }
+
+
+# --- Global Hotkeys ---
+class HotkeyListener:
+    """
+    One long-lived pynput keyboard listener for every global hotkey. The
+    hotkey table is rebuilt off the listener thread and swapped in with a
+    single assignment, so the old hotkeys (including the emergency stop) stay
+    armed until the new ones take over. Rapid updates are debounced, and
+    activations run on a small pool of worker threads.
+    """
+    def __init__(self, on_activate, workers=2, debounce=0.15, latency_samples=256):
+        self.on_activate = on_activate # Called with the action of the hotkey that fired
+        self.debounce = debounce
+        self._listener = None
+        self._table = {} # canonical key -> [(set of keys in the hotkey, action)]
+        self._pressed = set()
+        self._pending_config = None
+        self._config_changed = threading.Condition()
+        self._tasks = queue.Queue()
+        self._latencies = deque(maxlen=latency_samples) # Seconds from key press to action start
+        self._workers = workers
+        self._started = False
+
+    def start(self):
+        """ Starts the keyboard listener, the updater and the workers. Requires pynput. """
+        from pynput import keyboard
+        if self._started:
+            return
+        self._started = True
+        self._keyboard = keyboard
+        self._listener = keyboard.Listener(on_press=self._on_press, on_release=self._on_release)
+        self._listener.daemon = True
+        self._listener.start()
+        threading.Thread(target=self._update_loop, daemon=True).start()
+        for _ in range(self._workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def stop(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+
+    def update(self, hotkey_config):
+        """
+        Replaces the hotkeys with {hotkey string: action}, e.g.
+        {'<ctrl>+<alt>+s': 'emergency_stop'}. Returns immediately; the new
+        table takes effect once updates have been quiet for `debounce` seconds.
+        """
+        with self._config_changed:
+            self._pending_config = dict(hotkey_config)
+            self._config_changed.notify()
+
+    def latency_stats(self):
+        """ Returns trigger-to-dispatch latency of recent activations, in milliseconds. """
+        return latency_stats(list(self._latencies))
+
+    def _update_loop(self):
+        while True:
+            with self._config_changed:
+                while self._pending_config is None:
+                    self._config_changed.wait()
+                # Wait until no newer update has arrived for a whole debounce period.
+                config = self._pending_config
+                while True:
+                    self._config_changed.wait(self.debounce)
+                    if self._pending_config is config:
+                        break
+                    config = self._pending_config
+                self._pending_config = None
+            self._table = self._build_table(config) # Atomic swap; the listener reads it lock-free
+
+    def _build_table(self, hotkey_config):
+        table = {}
+        for hotkey_str, action in hotkey_config.items():
+            try:
+                keys = {self._listener.canonical(key) for key in self._keyboard.HotKey.parse(hotkey_str)}
+            except ValueError as e:
+                print(f"Ignoring invalid hotkey '{hotkey_str}': {e}")
+                continue
+            for key in keys:
+                table.setdefault(key, []).append((keys, action))
+        if table:
+            print(f"Hotkeys armed: {list(hotkey_config.keys())}")
+        else:
+            print("No hotkeys to listen for.")
+        return table
+
+    def _on_press(self, key):
+        triggered = time.perf_counter()
+        key = self._listener.canonical(key)
+        if key in self._pressed:
+            return # Auto-repeat while the key is held
+        self._pressed.add(key)
+        for keys, action in self._table.get(key, ()):
+            if keys <= self._pressed:
+                self._tasks.put((action, triggered))
+
+    def _on_release(self, key):
+        self._pressed.discard(self._listener.canonical(key))
+
+    def _work(self):
+        while True:
+            action, triggered = self._tasks.get()
+            self._latencies.append(time.perf_counter() - triggered)
+            try:
+                self.on_activate(action)
+            except Exception as e:
+                print(f"Hotkey action '{action}' failed: {e}")
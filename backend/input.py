@@ -0,0 +1,226 @@
+import sys
+import time
+
+
+def parse_keys(pynput_str):
+    """ Splits a recorded key string like '<ctrl>+c' into ['ctrl', 'c']. """
+    return [key for key in pynput_str.replace('<', '').replace('>', '').split('+') if key]
+
+
+# --- Input Backends ---
+class InputBackend:
+    """
+    Sends mouse and keyboard input. Every method acts immediately with no
+    built-in pauses; timing (holds, tweened moves, typing delays) is handled
+    by the runner's scheduler so it stays cancellable.
+    """
+    name = 'base'
+    PASTE_KEYS = ('command', 'v') if sys.platform == 'darwin' else ('ctrl', 'v')
+
+    def position(self): raise NotImplementedError
+    def move_to(self, x, y): raise NotImplementedError
+    def click(self, button, clicks=1): raise NotImplementedError
+    def mouse_down(self, button): raise NotImplementedError
+    def mouse_up(self, button): raise NotImplementedError
+    def scroll(self, amount): raise NotImplementedError
+    def key_down(self, key): raise NotImplementedError
+    def key_up(self, key): raise NotImplementedError
+    def type_text(self, text): raise NotImplementedError
+
+    def press(self, key):
+        self.key_down(key)
+        self.key_up(key)
+
+    def hotkey(self, *keys):
+        """ Presses keys in order and releases them in reverse, e.g. ctrl+shift+s. """
+        for key in keys:
+            self.key_down(key)
+        for key in reversed(keys):
+            self.key_up(key)
+
+    def type_unicode(self, text):
+        """ Types text as unicode key events, including characters with no key on the layout. """
+        self.type_text(text)
+
+    def paste(self):
+        """ Sends the platform's paste shortcut. """
+        self.hotkey(*self.PASTE_KEYS)
+
+    def get_clipboard(self):
+        """ Returns the clipboard's text. Non-text contents read as ''. """
+        import pyperclip
+        return pyperclip.paste()
+
+    def set_clipboard(self, text):
+        import pyperclip
+        pyperclip.copy(text)
+
+    def dispatch(self, actions):
+        """ Performs a batch of (method name, args) actions back to back. """
+        for name, args in actions:
+            getattr(self, name)(*args)
+
+
+class PyAutoGuiInputBackend(InputBackend):
+    """ Input through pyautogui, with its global PAUSE skipped on every call. """
+    name = 'pyautogui'
+    # Recorded key names (the editor's and pynput's) that pyautogui spells
+    # differently. pyautogui silently ignores names it doesn't know.
+    KEY_NAMES = {
+        'page_up': 'pageup', 'page_down': 'pagedown',
+        'cmd': 'command' if sys.platform == 'darwin' else 'win',
+        'caps_lock': 'capslock', 'num_lock': 'numlock', 'scroll_lock': 'scrolllock',
+        'print_screen': 'printscreen', 'menu': 'apps',
+        'media_play_pause': 'playpause', 'media_volume_mute': 'volumemute',
+        'media_volume_down': 'volumedown', 'media_volume_up': 'volumeup',
+        'media_previous': 'prevtrack', 'media_next': 'nexttrack',
+    }
+
+    def __init__(self):
+        import pyautogui
+        self.pyautogui = pyautogui
+        self._unicode_keyboard = None
+
+    def _key(self, key):
+        return self.KEY_NAMES.get(key, key)
+
+    def position(self):
+        x, y = self.pyautogui.position()
+        return x, y
+
+    def move_to(self, x, y):
+        self.pyautogui.moveTo(x, y, _pause=False)
+
+    def click(self, button, clicks=1):
+        self.pyautogui.click(button=button, clicks=clicks, interval=0, _pause=False)
+
+    def mouse_down(self, button):
+        self.pyautogui.mouseDown(button=button, _pause=False)
+
+    def mouse_up(self, button):
+        self.pyautogui.mouseUp(button=button, _pause=False)
+
+    def scroll(self, amount):
+        self.pyautogui.scroll(int(amount), _pause=False)
+
+    def key_down(self, key):
+        self.pyautogui.keyDown(self._key(key), _pause=False)
+
+    def key_up(self, key):
+        self.pyautogui.keyUp(self._key(key), _pause=False)
+
+    def press(self, key):
+        self.pyautogui.press(self._key(key), _pause=False)
+
+    def hotkey(self, *keys):
+        self.pyautogui.hotkey(*[self._key(key) for key in keys], interval=0, _pause=False)
+
+    def type_text(self, text):
+        self.pyautogui.write(text, interval=0, _pause=False)
+
+    def type_unicode(self, text):
+        # pyautogui.write skips anything outside its key map; pynput can send any character.
+        if self._unicode_keyboard is None:
+            from pynput.keyboard import Controller
+            self._unicode_keyboard = Controller()
+        self._unicode_keyboard.type(text)
+
+
+class PynputInputBackend(InputBackend):
+    """ Input through pynput's controllers directly. Types any unicode text. """
+    name = 'pynput'
+    PASTE_KEYS = ('cmd', 'v') if sys.platform == 'darwin' else ('ctrl', 'v')
+
+    def __init__(self):
+        from pynput import keyboard, mouse
+        self.Key = keyboard.Key
+        self.Button = mouse.Button
+        self.keyboard = keyboard.Controller()
+        self.mouse = mouse.Controller()
+
+    def _key(self, key):
+        # Named keys ('ctrl', 'f1', 'page_up', ...) map to pynput's Key enum.
+        return getattr(self.Key, key, None) or key
+
+    def _button(self, button):
+        return getattr(self.Button, button, self.Button.left)
+
+    def position(self):
+        x, y = self.mouse.position
+        return x, y
+
+    def move_to(self, x, y):
+        self.mouse.position = (x, y)
+
+    def click(self, button, clicks=1):
+        self.mouse.click(self._button(button), clicks)
+
+    def mouse_down(self, button):
+        self.mouse.press(self._button(button))
+
+    def mouse_up(self, button):
+        self.mouse.release(self._button(button))
+
+    def scroll(self, amount):
+        # Amounts use pyautogui's units; on Windows that is wheel delta (120 per notch).
+        steps = amount / 120 if sys.platform == 'win32' else int(amount)
+        self.mouse.scroll(0, steps)
+
+    def key_down(self, key):
+        self.keyboard.press(self._key(key))
+
+    def key_up(self, key):
+        self.keyboard.release(self._key(key))
+
+    def type_text(self, text):
+        self.keyboard.type(text)
+
+
+class RecordingInputBackend(InputBackend):
+    """ Records actions with timestamps instead of sending them. For tests. """
+    name = 'recording'
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.actions = [] # (time, method name, args)
+        self.cursor = (0, 0)
+        self.clipboard = ''
+
+    def _record(self, name, *args):
+        self.actions.append((self.clock(), name, args))
+
+    def position(self):
+        return self.cursor
+
+    def move_to(self, x, y):
+        self.cursor = (x, y)
+        self._record('move_to', x, y)
+
+    def click(self, button, clicks=1): self._record('click', button, clicks)
+    def mouse_down(self, button): self._record('mouse_down', button)
+    def mouse_up(self, button): self._record('mouse_up', button)
+    def scroll(self, amount): self._record('scroll', amount)
+    def key_down(self, key): self._record('key_down', key)
+    def key_up(self, key): self._record('key_up', key)
+    def press(self, key): self._record('press', key)
+    def hotkey(self, *keys): self._record('hotkey', *keys)
+    def type_text(self, text): self._record('type_text', text)
+    def type_unicode(self, text): self._record('type_unicode', text)
+    def paste(self): self._record('paste', self.clipboard)
+    def get_clipboard(self): return self.clipboard
+    def set_clipboard(self, text): self.clipboard = text
+
+
+INPUT_BACKENDS = {
+    'pyautogui': PyAutoGuiInputBackend,
+    'pynput': PynputInputBackend,
+    'recording': RecordingInputBackend,
+}
+
+
+def create_input_backend(name='pyautogui'):
+    """ Creates an input backend by name. """
+    try:
+        return INPUT_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown input backend '{name}'. Choose from: {', '.join(INPUT_BACKENDS)}")
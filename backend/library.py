@@ -0,0 +1,238 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.storage import MacroStorage
+
+MACRO_EXTENSION = '.macro'
+POOL_MIN_FILES = 32 # Fewer changed files than this are parsed in-process; a pool costs more to start
+INSERT_BATCH_SIZE = 500
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    root TEXT,
+    signature TEXT NOT NULL,
+    node_count INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_root ON files(root);
+CREATE TABLE IF NOT EXISTS start_nodes (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    node_id TEXT NOT NULL,
+    hotkey TEXT,
+    hotkey_display TEXT
+);
+CREATE INDEX IF NOT EXISTS start_nodes_path ON start_nodes(path);
+CREATE INDEX IF NOT EXISTS start_nodes_hotkey ON start_nodes(hotkey COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS start_nodes_hotkey_display ON start_nodes(hotkey_display COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS node_types (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    node_type TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS node_types_path ON node_types(path);
+CREATE INDEX IF NOT EXISTS node_types_type ON node_types(node_type);
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    image_path TEXT NOT NULL,
+    image_name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_path ON images(path);
+CREATE INDEX IF NOT EXISTS images_image_path ON images(image_path);
+CREATE INDEX IF NOT EXISTS images_image_name ON images(image_name COLLATE NOCASE);
+'''
+
+
+def normalize_path(path):
+    """ Returns the form paths are stored and compared in, e.g. case-folded on Windows. """
+    return os.path.normcase(os.path.abspath(path))
+
+
+def parse_macro_file(path):
+    """
+    Reads one macro file (with its journal) and returns what the library
+    records about it. Runs in worker processes, so it only returns plain data.
+    """
+    try:
+        canvas = MacroStorage().load(path)
+    except (OSError, ValueError) as e:
+        return {'error': str(e)}
+
+    start_nodes, node_types, images = [], {}, set()
+    for node in canvas.get('nodes', []):
+        node_type = node.get('type')
+        node_types[node_type] = node_types.get(node_type, 0) + 1
+        if node_type == 'start':
+            hotkey = node.get('values', {}).get('Hotkey')
+            if isinstance(hotkey, dict):
+                start_nodes.append((node.get('id'), hotkey.get('pynput') or None, hotkey.get('display')))
+            else:
+                start_nodes.append((node.get('id'), None, None))
+        if node.get('imagePath'):
+            images.add(node['imagePath'])
+    return {'start_nodes': start_nodes, 'node_types': node_types, 'images': sorted(images)}
+
+
+# --- Macro Library Index ---
+class MacroLibrary:
+    """
+    SQLite index of the macro files under a set of library folders. For each
+    file it records the Start nodes and their hotkeys, how many nodes of each
+    type it has and which images it refers to. scan() only re-reads files
+    whose size or modification time changed, parsing large batches in a
+    process pool; queries never open a macro file.
+    """
+    def __init__(self, db_path, max_workers=None):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('PRAGMA foreign_keys=ON')
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock() # One connection, shared by the Api threads
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # --- Updating ---
+    def add_roots(self, folders):
+        with self._lock, self._db:
+            self._db.executemany('INSERT OR IGNORE INTO roots (path) VALUES (?)',
+                                 [(normalize_path(folder),) for folder in folders])
+
+    def remove_root(self, folder):
+        """ Stops indexing a folder and drops its files from the index. """
+        root = normalize_path(folder)
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM roots WHERE path = ?', (root,))
+            self._db.execute('DELETE FROM files WHERE root = ?', (root,))
+
+    def roots(self):
+        with self._lock:
+            return [row['path'] for row in self._db.execute('SELECT path FROM roots ORDER BY path')]
+
+    def scan(self, folders=()):
+        """
+        Adds any new folders, then brings the index up to date with every
+        library folder. Returns counts of what changed and how long it took.
+        """
+        started = time.perf_counter()
+        if folders:
+            self.add_roots(folders)
+
+        found = {} # path -> (root, signature)
+        for root in self.roots():
+            for directory, _, file_names in os.walk(root):
+                for file_name in file_names:
+                    if file_name.endswith(MACRO_EXTENSION):
+                        path = normalize_path(os.path.join(directory, file_name))
+                        found[path] = (root, json.dumps(MacroStorage.signature(path)))
+
+        with self._lock:
+            indexed = {row['path']: (row['root'], row['signature'])
+                       for row in self._db.execute('SELECT path, root, signature FROM files')}
+        changed = [path for path, entry in found.items() if indexed.get(path) != entry]
+        # Files indexed on their own (saved or opened outside the library folders) stay while they exist.
+        removed = [path for path, (root, _) in indexed.items()
+                   if path not in found and (root is not None or not os.path.exists(path))]
+
+        parsed = self._parse(changed)
+        with self._lock, self._db:
+            self._db.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in removed])
+            for i in range(0, len(changed), INSERT_BATCH_SIZE):
+                batch = changed[i:i + INSERT_BATCH_SIZE]
+                self._store([(path, found[path][0], found[path][1], parsed[path]) for path in batch])
+
+        return {
+            'files': len(found),
+            'added': sum(1 for path in changed if path not in indexed),
+            'updated': sum(1 for path in changed if path in indexed),
+            'removed': len(removed),
+            'elapsed_ms': (time.perf_counter() - started) * 1000,
+        }
+
+    def update_file(self, path):
+        """ Re-indexes one file if it changed, e.g. right after it was saved. """
+        path = normalize_path(path)
+        signature = json.dumps(MacroStorage.signature(path))
+        with self._lock:
+            row = self._db.execute('SELECT root, signature FROM files WHERE path = ?', (path,)).fetchone()
+            if row and row['signature'] == signature:
+                return False
+            root = row['root'] if row else self._root_of(path)
+        info = parse_macro_file(path)
+        with self._lock, self._db:
+            self._store([(path, root, signature, info)])
+        return True
+
+    def _root_of(self, path):
+        for (root,) in self._db.execute('SELECT path FROM roots'):
+            if path.startswith(os.path.join(root, '')):
+                return root
+        return None
+
+    def _parse(self, paths):
+        """ Returns {path: parse_macro_file(path)}, using worker processes for big batches. """
+        if len(paths) < POOL_MIN_FILES:
+            return {path: parse_macro_file(path) for path in paths}
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            chunk_size = max(1, len(paths) // ((self.max_workers or os.cpu_count() or 1) * 4))
+            return dict(zip(paths, pool.map(parse_macro_file, paths, chunksize=chunk_size)))
+
+    def _store(self, entries):
+        """ Replaces the rows of (path, root, signature, parsed info) entries. Caller holds the lock. """
+        now = time.time()
+        self._db.executemany('DELETE FROM files WHERE path = ?', [(path,) for path, _, _, _ in entries])
+        self._db.executemany(
+            'INSERT INTO files (path, root, signature, node_count, error, indexed_at) VALUES (?, ?, ?, ?, ?, ?)',
+            [(path, root, signature, sum(info.get('node_types', {}).values()), info.get('error'), now)
+             for path, root, signature, info in entries])
+        self._db.executemany(
+            'INSERT INTO start_nodes (path, node_id, hotkey, hotkey_display) VALUES (?, ?, ?, ?)',
+            [(path,) + tuple(start) for path, _, _, info in entries for start in info.get('start_nodes', [])])
+        self._db.executemany(
+            'INSERT INTO node_types (path, node_type, count) VALUES (?, ?, ?)',
+            [(path, node_type, count) for path, _, _, info in entries for node_type, count in info.get('node_types', {}).items()])
+        self._db.executemany(
+            'INSERT INTO images (path, image_path, image_name) VALUES (?, ?, ?)',
+            [(path, normalize_path(image), os.path.basename(image)) for path, _, _, info in entries for image in info.get('images', [])])
+
+    # --- Queries ---
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, parameters)]
+
+    def files(self):
+        """ Returns every indexed file with its node count and any read error. """
+        return self._query('SELECT path, node_count, error FROM files ORDER BY path')
+
+    def find_by_hotkey(self, hotkey):
+        """ Returns the Start nodes bound to a hotkey, given as '<ctrl>+a' or as displayed ('Ctrl + A'). """
+        return self._query(
+            'SELECT path, node_id, hotkey, hotkey_display FROM start_nodes '
+            'WHERE hotkey = ?1 COLLATE NOCASE OR hotkey_display = ?1 COLLATE NOCASE ORDER BY path', (hotkey,))
+
+    def find_by_image(self, image):
+        """ Returns the files that use an image, given as a full path or just a file name. """
+        if os.path.basename(image) == image:
+            return self._query('SELECT DISTINCT path, image_path FROM images WHERE image_name = ? COLLATE NOCASE ORDER BY path', (image,))
+        return self._query('SELECT DISTINCT path, image_path FROM images WHERE image_path = ? ORDER BY path', (normalize_path(image),))
+
+    def find_by_node_type(self, node_type):
+        """ Returns the files that contain a node type, with how many of those nodes each has. """
+        return self._query('SELECT path, count FROM node_types WHERE node_type = ? ORDER BY count DESC, path', (node_type,))
+
+    def hotkeys(self):
+        """ Returns every hotkey bound in the library, so clashes between files are easy to spot. """
+        return self._query(
+            'SELECT hotkey, hotkey_display, COUNT(*) AS uses FROM start_nodes WHERE hotkey IS NOT NULL '
+            'GROUP BY hotkey COLLATE NOCASE ORDER BY uses DESC, hotkey')
@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+
+
+def percentile(ordered, fraction):
+    """ Returns the value at fraction (0-1) of an already sorted list. """
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+# --- Macro Profiler ---
+class Profiler:
+    """
+    Records how long each node execution and data-pin evaluation takes in a
+    macro run. Produces per-node and per-type statistics and can export a
+    Chrome trace-event file (open it in chrome://tracing or Perfetto).
+    """
+    def __init__(self, max_events=200000):
+        self.max_events = max_events
+        self.origin = time.perf_counter()
+        self.events = [] # (category, node id, node type, start, end, thread id)
+        self.dropped_events = 0
+        self._durations = {} # (category, node id, node type) -> [seconds]
+        self._lock = threading.Lock()
+
+    def record(self, category, node_id, node_type, start, end):
+        """ Stores one timed span. category is 'node' or 'data'. """
+        with self._lock:
+            self._durations.setdefault((category, node_id, node_type), []).append(end - start)
+            if len(self.events) < self.max_events:
+                self.events.append((category, node_id, node_type, start, end, threading.get_ident()))
+            else:
+                self.dropped_events += 1
+
+    @staticmethod
+    def _stats(durations):
+        ordered = sorted(durations)
+        return {
+            'count': len(ordered),
+            'total_ms': sum(ordered) * 1000,
+            'p50_ms': percentile(ordered, 0.5) * 1000,
+            'p99_ms': percentile(ordered, 0.99) * 1000,
+        }
+
+    def summary(self):
+        """
+        Returns {'nodes': [...], 'types': [...]} with count, total, p50 and p99
+        for every node and node type, slowest total first.
+        """
+        with self._lock:
+            durations = {key: list(values) for key, values in self._durations.items()}
+
+        by_type = {}
+        nodes = []
+        for (category, node_id, node_type), values in durations.items():
+            nodes.append({'category': category, 'node_id': node_id, 'type': node_type, **self._stats(values)})
+            by_type.setdefault((category, node_type), []).extend(values)
+        types = [{'category': category, 'type': node_type, **self._stats(values)}
+                 for (category, node_type), values in by_type.items()]
+
+        nodes.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        types.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return {'nodes': nodes, 'types': types, 'dropped_events': self.dropped_events}
+
+    def to_chrome_trace(self):
+        """ Returns the recorded spans in Chrome's trace-event JSON format. """
+        with self._lock:
+            events = list(self.events)
+        return {
+            'traceEvents': [{
+                'name': f"{node_type} {node_id}",
+                'cat': category,
+                'ph': 'X',
+                'ts': (start - self.origin) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': 1,
+                'tid': thread_id,
+                'args': {'node_id': node_id, 'type': node_type},
+            } for category, node_id, node_type, start, end, thread_id in events],
+            'displayTimeUnit': 'ms',
+        }
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
@@ -0,0 +1,392 @@
+import statistics
+import sys
+import threading
+import time
+from array import array
+
+# --- Event Kinds ---
+MOVE, MOUSE_DOWN, MOUSE_UP, SCROLL, KEY_DOWN, KEY_UP = range(6)
+BUTTONS = ('left', 'right', 'middle')
+
+# --- Generation Parameters ---
+DELAY_QUANTUM = 0.05 # Delays are rounded to this many seconds; shorter gaps are dropped
+TYPING_QUANTUM = 0.01 # Typing intervals are rounded to this many seconds
+HOLD_THRESHOLD = 0.5 # A key or button down this long becomes a Hold action
+DOUBLE_CLICK_TIME = 0.4
+DOUBLE_CLICK_DISTANCE = 4
+MOVE_PAUSE_SPLIT = 0.25 # A cursor resting this long ends a mouse path
+PATH_TOLERANCE = 3.0 # Pixels a simplified mouse path may deviate from the real one
+TEXT_GAP = 1.0 # Typed characters closer together than this form one Type String
+SCROLL_GAP = 0.3 # Wheel ticks closer together than this form one Scroll
+NODE_SPACING_X, NODE_SPACING_Y, NODES_PER_ROW = 260, 220, 8
+
+MODIFIERS = ('ctrl', 'shift', 'alt', 'cmd')
+MODIFIER_ALIASES = {
+    'ctrl_l': 'ctrl', 'ctrl_r': 'ctrl', 'shift_l': 'shift', 'shift_r': 'shift',
+    'alt_l': 'alt', 'alt_r': 'alt', 'alt_gr': 'alt', 'cmd_l': 'cmd', 'cmd_r': 'cmd',
+}
+TEXT_KEYS = {'space': ' '}
+
+
+# --- Event Buffer ---
+class EventBuffer:
+    """
+    Recorded input events in parallel typed arrays (about 21 bytes per event)
+    instead of one object per event. Key names are stored once in a table and
+    referenced by index.
+    """
+    def __init__(self):
+        self.times = array('d')
+        self.kinds = array('B')
+        self.xs = array('i')
+        self.ys = array('i')
+        self.codes = array('i') # Button index, scroll ticks or key name index
+        self.key_names = []
+        self._key_codes = {}
+        self._lock = threading.Lock() # Mouse and keyboard events arrive on different threads
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, kind, x=0, y=0, code=0, timestamp=None):
+        with self._lock:
+            self.times.append(time.perf_counter() if timestamp is None else timestamp)
+            self.kinds.append(kind)
+            self.xs.append(int(x))
+            self.ys.append(int(y))
+            self.codes.append(code)
+
+    def key_code(self, name):
+        code = self._key_codes.get(name)
+        if code is None:
+            with self._lock:
+                code = self._key_codes.setdefault(name, len(self.key_names))
+                if code == len(self.key_names):
+                    self.key_names.append(name)
+        return code
+
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.times, self.kinds, self.xs, self.ys, self.codes))
+
+    def drop_last_click(self):
+        """ Removes the last mouse click and any events after it (e.g. the click on 'Stop'). """
+        with self._lock:
+            for i in range(len(self.kinds) - 1, -1, -1):
+                if self.kinds[i] == MOUSE_DOWN:
+                    for values in (self.times, self.kinds, self.xs, self.ys, self.codes):
+                        del values[i:]
+                    return
+
+
+# --- Live Recording ---
+class InputRecorder:
+    """ Records global mouse and keyboard input into an EventBuffer. Requires pynput. """
+    def __init__(self):
+        self.buffer = EventBuffer()
+        self._listeners = []
+
+    @property
+    def is_recording(self):
+        return bool(self._listeners)
+
+    def start(self):
+        from pynput import keyboard, mouse
+        self.buffer = EventBuffer()
+        self._listeners = [
+            mouse.Listener(on_move=self._on_move, on_click=self._on_click, on_scroll=self._on_scroll),
+            keyboard.Listener(on_press=self._on_press, on_release=self._on_release),
+        ]
+        for listener in self._listeners:
+            listener.daemon = True
+            listener.start()
+
+    def stop(self):
+        for listener in self._listeners:
+            listener.stop()
+        self._listeners = []
+        return self.buffer
+
+    def _on_move(self, x, y):
+        self.buffer.append(MOVE, x, y)
+
+    def _on_click(self, x, y, button, pressed):
+        code = BUTTONS.index(button.name) if button.name in BUTTONS else 0
+        self.buffer.append(MOUSE_DOWN if pressed else MOUSE_UP, x, y, code)
+
+    def _on_scroll(self, x, y, dx, dy):
+        self.buffer.append(SCROLL, x, y, int(dy))
+
+    def _on_press(self, key):
+        self.buffer.append(KEY_DOWN, code=self.buffer.key_code(key_name(key)))
+
+    def _on_release(self, key):
+        self.buffer.append(KEY_UP, code=self.buffer.key_code(key_name(key)))
+
+
+def key_name(key):
+    """ Returns the editor's name for a pynput key, e.g. 'ctrl', 'enter' or 'a'. """
+    name = getattr(key, 'name', None)
+    if name:
+        return MODIFIER_ALIASES.get(name, name)
+    char = getattr(key, 'char', None)
+    if char and char.isprintable():
+        return char
+    # With Ctrl held some platforms report control characters; use the virtual key.
+    vk = getattr(key, 'vk', None)
+    if vk is not None and (48 <= vk <= 57 or 65 <= vk <= 90):
+        return chr(vk).lower()
+    return f"<{vk}>" if vk is not None else '<?>'
+
+
+def is_replayable(name):
+    """ Keys recorded only by virtual key code ('<vk>') have no name an input backend can press. """
+    return not (len(name) > 1 and name.startswith('<'))
+
+
+def format_keys(keys):
+    """ Mirrors the editor's formatKeys: returns {'display', 'pynput'} for a key combination. """
+    ordered = sorted(keys, key=lambda k: (MODIFIERS.index(k) if k in MODIFIERS else len(MODIFIERS), k))
+    display = ' + '.join('Space' if k in (' ', 'space') else k[:1].upper() + k[1:].replace('_', ' ') for k in ordered)
+    pynput_str = '+'.join(k if len(k) == 1 or k.startswith('<') else f"<{k}>" for k in ordered)
+    return {'display': display, 'pynput': pynput_str}
+
+
+# --- Mouse Path Simplification ---
+def simplify_path(points, tolerance=PATH_TOLERANCE):
+    """
+    Ramer-Douglas-Peucker: returns the indexes of the points to keep so the
+    polyline stays within `tolerance` pixels of the original.
+    """
+    if len(points) < 3:
+        return list(range(len(points)))
+    keep = {0, len(points) - 1}
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = (dx * dx + dy * dy) ** 0.5
+        farthest, max_distance = None, tolerance
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length:
+                distance = abs(dy * px - dx * py + x2 * y1 - y2 * x1) / length
+            else:
+                distance = ((px - x1) ** 2 + (py - y1) ** 2) ** 0.5
+            if distance > max_distance:
+                farthest, max_distance = i, distance
+        if farthest is not None:
+            keep.add(farthest)
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return sorted(keep)
+
+
+def quantize(seconds, quantum):
+    return round(round(seconds / quantum) * quantum, 3)
+
+
+# --- Node Generation ---
+def _collect_actions(buffer):
+    """
+    Turns raw events into timed actions: (start, end, node type, values,
+    (x, y) the action needs the cursor at, or None).
+    """
+    actions = []
+    times, kinds, xs, ys, codes, names = buffer.times, buffer.kinds, buffer.xs, buffer.ys, buffer.codes, buffer.key_names
+
+    path = [] # (time, x, y) of the current mouse path
+    def end_path():
+        if len(path) > 1:
+            kept = simplify_path([(x, y) for _, x, y in path])
+            for previous, current in zip(kept, kept[1:]):
+                start, end = path[previous][0], path[current][0]
+                _, x, y = path[current]
+                actions.append((start, end, 'mouse_move', {'X': x, 'Y': y, 'Duration': round(quantize(end - start, TYPING_QUANTUM) * 1000), 'Unit': 'milliseconds'}, None))
+        path.clear()
+
+    buttons_down = {} # button -> (time, x, y)
+    keys_down = {} # key name -> time
+    unused_modifiers = {} # modifier -> press time, until another key uses it
+    text = [] # (time, char) of the current typing run
+    scroll = [] # [start, end, ticks]
+    skipped_keys = set() # Keys with no replayable name
+
+    def end_text():
+        if text:
+            gaps = [b[0] - a[0] for a, b in zip(text, text[1:])]
+            delay = max(quantize(statistics.median(gaps), TYPING_QUANTUM), TYPING_QUANTUM) if gaps else TYPING_QUANTUM
+            typed = ''.join(c for _, c in text)
+            # pyautogui's per-character typing drops anything outside ASCII.
+            mode = 'per_character' if typed.isascii() else 'unicode'
+            actions.append((text[0][0], text[-1][0], 'type_string', {'Text': typed, 'Mode': mode, 'Delay': round(delay * 1000), 'Unit': 'milliseconds'}, None))
+            text.clear()
+
+    def end_scroll():
+        if scroll:
+            start, end, ticks, x, y = scroll
+            notch = 120 if sys.platform == 'win32' else 1 # Node amounts use pyautogui units
+            actions.append((start, end, 'mouse_scroll', {'Amount': abs(ticks) * notch, 'Direction': 'up' if ticks > 0 else 'down'}, (x, y)))
+            scroll.clear()
+
+    for i in range(len(times)):
+        t, kind, x, y, code = times[i], kinds[i], xs[i], ys[i], codes[i]
+        if kind == MOVE:
+            if path and t - path[-1][0] > MOVE_PAUSE_SPLIT:
+                # The cursor rested; the next path starts from where it stopped.
+                _, rest_x, rest_y = path[-1]
+                end_path()
+                path.append((t, rest_x, rest_y))
+            path.append((t, x, y))
+            continue
+        end_path()
+        if kind != SCROLL:
+            end_scroll()
+
+        if kind == MOUSE_DOWN:
+            end_text()
+            buttons_down[code] = (t, x, y)
+        elif kind == MOUSE_UP and code in buttons_down:
+            down_time, down_x, down_y = buttons_down.pop(code)
+            button = BUTTONS[code] if code < len(BUTTONS) else 'left'
+            if t - down_time >= HOLD_THRESHOLD:
+                values = {'Button': button, 'Action': 'hold', 'Duration': quantize(t - down_time, DELAY_QUANTUM), 'Unit': 'seconds'}
+            else:
+                values = {'Button': button, 'Action': 'click'}
+                last = actions[-1] if actions else None
+                if (last and last[2] == 'mouse_click' and last[3] == values and down_time - last[1] <= DOUBLE_CLICK_TIME
+                        and abs(last[4][0] - down_x) <= DOUBLE_CLICK_DISTANCE and abs(last[4][1] - down_y) <= DOUBLE_CLICK_DISTANCE):
+                    actions[-1] = (last[0], t, 'mouse_click', {'Button': button, 'Action': 'double_click'}, last[4])
+                    continue
+            actions.append((down_time, t, 'mouse_click', values, (down_x, down_y)))
+        elif kind == SCROLL:
+            end_text()
+            if scroll and t - scroll[1] <= SCROLL_GAP and (scroll[2] > 0) == (code > 0):
+                scroll[1] = t
+                scroll[2] += code
+            else:
+                end_scroll()
+                scroll.extend([t, t, code, x, y])
+        elif kind == KEY_DOWN:
+            name = names[code]
+            if not is_replayable(name):
+                skipped_keys.add(name)
+                continue
+            if name in keys_down:
+                continue # Auto-repeat
+            keys_down[name] = t
+            if name in MODIFIERS:
+                unused_modifiers[name] = t
+                continue
+            held = [m for m in MODIFIERS if m in keys_down]
+            char = TEXT_KEYS.get(name, name if len(name) == 1 else None)
+            if char and not [m for m in held if m != 'shift']:
+                unused_modifiers.pop('shift', None)
+                if text and t - text[-1][0] > TEXT_GAP:
+                    end_text()
+                text.append((t, char))
+                continue
+            end_text()
+            for modifier in held:
+                unused_modifiers.pop(modifier, None)
+            actions.append((t, t, 'key_press', {'Key': format_keys(held + [name]), 'Action': 'press'}, None))
+        elif kind == KEY_UP:
+            name = names[code]
+            down_time = keys_down.pop(name, None)
+            if down_time is None:
+                continue
+            if name in MODIFIERS and unused_modifiers.pop(name, None) is not None:
+                end_text()
+                actions.append((down_time, t, 'key_press', {'Key': format_keys([name]), 'Action': 'press'}, None))
+            elif t - down_time >= HOLD_THRESHOLD:
+                hold = {'Action': 'hold', 'Duration': quantize(t - down_time, DELAY_QUANTUM), 'Unit': 'seconds'}
+                if text and text[-1][0] == down_time:
+                    # A held character (e.g. W in a game) is a hold, not typing.
+                    text.pop()
+                    end_text()
+                    actions.append((down_time, t, 'key_press', {'Key': format_keys([name]), **hold}, None))
+                else:
+                    # Turn the press recorded on key down into a hold.
+                    for index in range(len(actions) - 1, -1, -1):
+                        start, end, node_type, values, _ = actions[index]
+                        if node_type == 'key_press' and start == down_time:
+                            actions[index] = (start, t, 'key_press', {**values, **hold}, None)
+                            break
+                        if node_type == 'type_string' and end == down_time:
+                            # Typing already ended at this character; move it out.
+                            if len(values['Text']) > 1:
+                                actions[index] = (start, end, node_type, {**values, 'Text': values['Text'][:-1]}, None)
+                            else:
+                                del actions[index]
+                            actions.append((down_time, t, 'key_press', {'Key': format_keys([name]), **hold}, None))
+                            break
+                        if start < down_time:
+                            break
+    end_path()
+    end_scroll()
+    end_text()
+    if skipped_keys:
+        print(f"Warning: Skipped recorded keys that can't be played back: {', '.join(sorted(skipped_keys))}")
+    actions.sort(key=lambda action: action[0])
+    return actions
+
+
+def build_macro(buffer):
+    """
+    Converts recorded events into a canvas in the format Api.load_file
+    returns: a Start node (Turbo Mode, so recorded delays set the pace)
+    followed by one chain of action and delay nodes. Holds that overlapped
+    while recording play back one after the other.
+    """
+    nodes = []
+    connections = []
+
+    def add(node_type, values):
+        index = len(nodes)
+        node_id = f"node-{index}"
+        nodes.append({
+            'id': node_id,
+            'type': node_type,
+            'left': f"{100 + (index % NODES_PER_ROW) * NODE_SPACING_X}px",
+            'top': f"{100 + (index // NODES_PER_ROW) * NODE_SPACING_Y}px",
+            'width': '',
+            'height': '',
+            'color': 'default',
+            'values': values,
+        })
+        if index:
+            connections.append({
+                'id': f"conn-{index}",
+                'startNodeId': f"node-{index - 1}",
+                'startPinName': 'exec',
+                'endNodeId': node_id,
+                'endPinName': 'exec',
+                'flow': 'exec',
+                'wire': None,
+            })
+
+    add('start', {'Hotkey': {'display': 'Press to record', 'pynput': ''}, 'Loop Continuously': False, 'Turbo Mode': True})
+    cursor = None
+    previous_end = None
+    for start, end, node_type, values, position in _collect_actions(buffer):
+        if previous_end is not None:
+            gap = quantize(start - previous_end, DELAY_QUANTUM)
+            if gap > 0:
+                add('delay', {'Duration': round(gap * 1000), 'Unit': 'milliseconds'})
+        if node_type == 'mouse_move':
+            cursor = (values['X'], values['Y'])
+        elif position and position != cursor:
+            # Clicks and scrolls happen where the cursor was, even if no move was recorded.
+            add('mouse_move', {'X': position[0], 'Y': position[1], 'Duration': 0, 'Unit': 'milliseconds'})
+            cursor = position
+        add(node_type, values)
+        previous_end = end
+
+    return {
+        'nodes': nodes,
+        'connections': connections,
+        'panX': 0,
+        'panY': 0,
+        'scale': 1,
+        'nodeIdCounter': len(nodes),
+    }
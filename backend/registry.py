@@ -0,0 +1,69 @@
+import queue
+import threading
+
+
+# --- Concurrent Macro Runners ---
+class RunnerRegistry:
+    """
+    Tracks every running macro by its start node id and runs them on a
+    bounded pool of worker threads, so independent macros (e.g. a background
+    keep-alive loop and an on-demand combo) can run side by side.
+    """
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._runners = {} # start node id -> MacroRunner
+        self._lock = threading.Lock()
+        self._tasks = queue.Queue()
+        self._worker_count = 0
+
+    def start(self, start_node_id, runner):
+        """ Queues a runner on the pool. Returns an error message if it can't run. """
+        with self._lock:
+            if start_node_id in self._runners:
+                return 'This macro is already running.'
+            if len(self._runners) >= self.max_workers:
+                return f'Too many macros running (limit {self.max_workers}).'
+            self._runners[start_node_id] = runner
+            # Workers are created on demand; there is always one free per active runner.
+            if self._worker_count < len(self._runners):
+                self._worker_count += 1
+                threading.Thread(target=self._work, daemon=True).start()
+        self._tasks.put((start_node_id, runner))
+        return None
+
+    def stop(self, start_node_id):
+        """ Stops one macro. Returns False if it wasn't running. """
+        with self._lock:
+            runner = self._runners.get(start_node_id)
+        if runner is None:
+            return False
+        runner.stop()
+        return True
+
+    def stop_all(self):
+        """ Stops every running macro. Returns how many were stopped. """
+        with self._lock:
+            runners = list(self._runners.values())
+        for runner in runners:
+            runner.stop()
+        return len(runners)
+
+    def get(self, start_node_id):
+        with self._lock:
+            return self._runners.get(start_node_id)
+
+    def running_ids(self):
+        with self._lock:
+            return list(self._runners)
+
+    def _work(self):
+        while True:
+            start_node_id, runner = self._tasks.get()
+            try:
+                runner.run()
+            except Exception as e:
+                print(f"Macro {start_node_id} crashed: {e}")
+            finally:
+                with self._lock:
+                    if self._runners.get(start_node_id) is runner:
+                        del self._runners[start_node_id]
@@ -0,0 +1,169 @@
+import math
+import sys
+import threading
+import time
+
+# Event.wait wakes within about a millisecond on Linux and macOS, but only on
+# the 15.6 ms system timer tick on Windows, so the spun stretch must cover a tick there.
+SPIN_THRESHOLD = 0.016 if sys.platform == 'win32' else 0.002
+
+
+# --- Timing ---
+class Scheduler:
+    """
+    Monotonic, cancellable timing for a macro run. Sleeps are expressed as
+    deadlines so repeated waits do not accumulate drift, and cancel() wakes
+    every pending sleep immediately.
+
+    The last spin_threshold seconds before a deadline are spun instead of
+    slept, as OS timers overshoot. That keeps sleeps sub-millisecond accurate
+    on every platform, at the cost of up to a timer tick (16 ms on Windows)
+    of busy waiting per sleep.
+    """
+    def __init__(self, spin_threshold=SPIN_THRESHOLD):
+        self.spin_threshold = spin_threshold
+        self._cancelled = threading.Event()
+        self.sleep_count = 0 # Sleeps that actually waited; lets the governor tell a loop is pacing itself
+
+    @staticmethod
+    def now():
+        """ Returns the current monotonic time in seconds. """
+        return time.perf_counter()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """ Wakes all pending sleeps and makes future sleeps return at once. """
+        self._cancelled.set()
+
+    def sleep(self, duration):
+        """ Sleeps for a duration in seconds. Returns False if cancelled. """
+        return self.sleep_until(self.now() + duration)
+
+    def sleep_until(self, deadline):
+        """ Sleeps until a monotonic deadline. Returns False if cancelled. """
+        if deadline == math.inf: # Nothing left to wait for but a stop
+            self.sleep_count += 1
+            self._cancelled.wait()
+            return False
+        remaining = deadline - self.now()
+        if remaining > 0:
+            self.sleep_count += 1
+        while remaining > self.spin_threshold:
+            if self._cancelled.wait(remaining - self.spin_threshold):
+                return False
+            remaining = deadline - self.now()
+
+        while self.now() < deadline:
+            if self._cancelled.is_set():
+                return False
+            time.sleep(0) # Yield the GIL while spinning
+        return not self._cancelled.is_set()
+
+    def hold(self, duration):
+        """ Sleeps for a duration even if cancelled, for waits that must not be cut short. """
+        time.sleep(duration)
+
+
+class VirtualScheduler(Scheduler):
+    """
+    Scheduler for dry runs. Time is a counter starting at zero that sleeps
+    advance instantly, so a macro with minutes of delays simulates in
+    milliseconds and always produces the same timings. A sleep past
+    max_seconds stops the clock there and cancels the run, so waits that
+    poll forever still end.
+    """
+    def __init__(self, max_seconds=None):
+        super().__init__()
+        self.time = 0.0
+        self.max_seconds = max_seconds
+        self.limit_reached = None # 'time' once a sleep ran into max_seconds
+
+    def now(self):
+        return self.time
+
+    def sleep_until(self, deadline):
+        if self.cancelled:
+            return False
+        if deadline == math.inf and self.max_seconds is None: # Would never wake up
+            self.cancel()
+            return False
+        if self.max_seconds is not None and deadline > self.max_seconds:
+            self.time = max(self.time, self.max_seconds)
+            self.limit_reached = 'time'
+            self.cancel()
+            return False
+        if deadline > self.time:
+            self.sleep_count += 1
+            self.time = deadline
+        return True
+
+    def hold(self, duration):
+        self.time += max(duration, 0)
+
+
+class FixedRateTimer:
+    """
+    Paces a loop at a fixed number of iterations per second. Each deadline is
+    computed from the start time, so the rate stays exact over long runs.
+    Iterations that overrun skip the missed ticks instead of bursting.
+    """
+    def __init__(self, scheduler, rate):
+        self.scheduler = scheduler
+        self.period = 1.0 / rate
+        self.start_time = scheduler.now()
+        self.tick = 0
+
+    def wait(self):
+        """ Sleeps until the next tick. Returns False if cancelled. """
+        self.tick += 1
+        behind = self.scheduler.now() - (self.start_time + self.tick * self.period)
+        if behind > 0:
+            self.tick += int(behind // self.period) + 1
+        return self.scheduler.sleep_until(self.start_time + self.tick * self.period)
+
+
+class AdaptivePoller:
+    """
+    Paces a polling loop that waits for something on screen. Polls start at
+    min_interval and back off geometrically while nothing changes, up to
+    max_interval; any change snaps back to the fastest rate. Waits never run
+    past the timeout and end at once when the scheduler is cancelled.
+
+    On a static screen (a dry run's blank one) another poll can't see anything
+    new, so a wait that saw no change sleeps straight to the caller's due time
+    or the timeout, or until cancelled if it has neither.
+    """
+    def __init__(self, scheduler, timeout=None, min_interval=0.01, max_interval=0.25, backoff=1.5, static=False):
+        self.scheduler = scheduler
+        self.static = static
+        self.deadline = scheduler.now() + timeout if timeout else None
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.polls = 0
+
+    def wait(self, changed=False, due=None):
+        """
+        Sleeps until the next poll. `changed` says whether the last poll saw
+        the screen change; `due` is a time the caller needs a poll by (e.g.
+        when a region will have been stable long enough). Returns False once
+        timed out or cancelled.
+        """
+        self.polls += 1
+        now = self.scheduler.now()
+        if self.deadline is not None and now >= self.deadline:
+            return False
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        next_poll = math.inf if self.static and not changed else now + self.interval
+        if due is not None:
+            next_poll = min(next_poll, max(due, now))
+        if self.deadline is not None:
+            next_poll = min(next_poll, self.deadline) # One last poll right at the timeout
+        return self.scheduler.sleep_until(next_poll)
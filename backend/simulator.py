@@ -0,0 +1,81 @@
+import time
+
+import numpy as np # Make sure to install this: pip install numpy
+
+from backend.capture import ScreenCapture, SyntheticCaptureBackend
+from backend.executor import MacroRunner
+from backend.input import RecordingInputBackend
+from backend.scheduler import VirtualScheduler
+from backend.trace import NullTrace
+
+SIMULATED_SCREEN = (1080, 1920) # Height and width of the blank screen seen by screen-reading nodes
+MAX_SIMULATED_SECONDS = 24 * 60 * 60 # Dry runs of looping macros end after this much virtual time
+MAX_SIMULATED_STEPS = 200000 # ... or after this many node executions
+MAX_LOGGED_ACTIONS = 10000 # Actions returned in the log; the count covers all of them
+
+
+class SimulationTrace(NullTrace):
+    """
+    Counts executed nodes and ends a dry run once it passes its step limit or
+    the virtual scheduler reaches its time limit. Waits that poll inside one
+    node are ended by the scheduler itself.
+    """
+    def __init__(self, scheduler, max_steps):
+        self.scheduler = scheduler
+        self.max_steps = max_steps
+        self.runner = None
+        self.steps = 0
+        self.limit_reached = None
+
+    def highlight(self, node_id):
+        self.steps += 1
+        if self.limit_reached:
+            return
+        if self.steps > self.max_steps:
+            self.limit_reached = 'steps'
+        elif self.scheduler.limit_reached:
+            self.limit_reached = self.scheduler.limit_reached
+        if self.limit_reached and self.runner:
+            self.runner.stop()
+
+
+# --- Dry Runs ---
+def simulate_macro(macro_data, max_seconds=MAX_SIMULATED_SECONDS, max_steps=MAX_SIMULATED_STEPS,
+                   max_logged_actions=MAX_LOGGED_ACTIONS):
+    """
+    Runs a macro against a virtual clock and a recording input backend.
+    Delays, mouse glides and typing intervals advance virtual time without
+    waiting, and no input reaches the system. Screen-reading nodes see a
+    blank screen, so find_image takes its Not Found path and waits time out.
+    As that screen never changes, waits skip straight to their timeout.
+
+    Returns the timed action log and the projected run time. Looping macros
+    are cut off at max_seconds of virtual time or max_steps node executions.
+    Raises RuntimeError if a node fails, as the run would stop there.
+    """
+    scheduler = VirtualScheduler(max_seconds)
+    recorder = RecordingInputBackend(scheduler.now)
+    blank_screen = np.zeros(SIMULATED_SCREEN + (3,), dtype=np.uint8)
+    capture = ScreenCapture(SyntheticCaptureBackend([blank_screen]))
+    trace = SimulationTrace(scheduler, max_steps)
+
+    runner = MacroRunner(macro_data, None, trace=trace, capture=capture, input_backend=recorder, scheduler=scheduler)
+    trace.runner = runner
+    started = time.perf_counter()
+    runner.run()
+    elapsed = time.perf_counter() - started
+    if runner.error:
+        raise RuntimeError(runner.error)
+
+    actions = [
+        {'time_ms': round(timestamp * 1000, 3), 'action': name, 'args': list(args)}
+        for timestamp, name, args in recorder.actions[:max_logged_actions]
+    ]
+    return {
+        'duration_ms': round(scheduler.now() * 1000, 3),
+        'actions': actions,
+        'action_count': len(recorder.actions),
+        'steps': trace.steps,
+        'limit_reached': trace.limit_reached or scheduler.limit_reached, # None when the macro ran to completion
+        'simulation_ms': elapsed * 1000,
+    }
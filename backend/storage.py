@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+
+JOURNAL_SUFFIX = '.journal'
+COMPACT_AFTER_CHANGES = 500 # Journal changes replayed before they are folded into the snapshot
+CANVAS_FIELDS = ('panX', 'panY', 'scale', 'nodeIdCounter')
+
+def _create_temp_file(directory):
+    """
+    Creates an empty file with a unique name in directory and returns (fd,
+    path). Unlike mkstemp (always 0600) it is created 0666 less the umask,
+    like open() would.
+    """
+    while True:
+        temp_path = os.path.join(directory, f".{os.urandom(8).hex()}.tmp")
+        try:
+            return os.open(temp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666), temp_path
+        except FileExistsError:
+            continue
+
+
+def write_json_atomic(path, data, indent=None):
+    """
+    Writes data as JSON (compact unless indent is given) to a temporary file
+    next to path, then renames it over path. Readers see either the old file
+    or the new one, never a partial write. An existing file keeps its
+    permissions.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = _create_temp_file(directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent, separators=None if indent else (',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass # A new file keeps the umask default it was created with
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def connection_key(connection):
+    """
+    Identifies a connection by the pins it joins. Connection ids aren't unique:
+    the editor makes them from Date.now(), so wires created together share one.
+    """
+    return (connection.get('startNodeId'), connection.get('startPinName'),
+            connection.get('endNodeId'), connection.get('endPinName'))
+
+
+def apply_changes(canvas, changes):
+    """
+    Applies journal changes to canvas data in place. Every change replaces
+    or removes a node by id or a connection by connection_key, so replaying
+    a change twice is harmless.
+
+    Changes: {'op': 'put_node', 'node': {...}}, {'op': 'remove_node', 'id': ...},
+    {'op': 'put_connection', 'connection': {...}}, {'op': 'remove_connection', 'connection': {...}},
+    {'op': 'set', 'key': 'panX', 'value': ...}. Older journals remove
+    connections by 'id' instead.
+    """
+    if not changes:
+        return canvas
+    nodes = {node['id']: node for node in canvas.get('nodes', [])}
+    connections = {connection_key(conn): conn for conn in canvas.get('connections', [])}
+    for change in changes:
+        op = change.get('op')
+        if op == 'put_node':
+            nodes[change['node']['id']] = change['node']
+        elif op == 'remove_node':
+            nodes.pop(change['id'], None)
+        elif op == 'put_connection':
+            connections[connection_key(change['connection'])] = change['connection']
+        elif op == 'remove_connection' and 'connection' in change:
+            connections.pop(connection_key(change['connection']), None)
+        elif op == 'remove_connection':
+            connections = {key: conn for key, conn in connections.items() if conn.get('id') != change['id']}
+        elif op == 'set' and change.get('key') in CANVAS_FIELDS:
+            canvas[change['key']] = change.get('value')
+        else:
+            raise ValueError(f"Unknown journal change: {op}")
+    # Dicts keep insertion order, so untouched items stay where they were.
+    canvas['nodes'] = list(nodes.values())
+    canvas['connections'] = list(connections.values())
+    return canvas
+
+
+def macro_from_canvas(canvas, start_node_id=None):
+    """
+    Returns the macro data for one Start node of a saved canvas, as the editor
+    would send it to Api.run_macro. Without an id the canvas must have exactly
+    one Start node.
+    """
+    start_ids = [node['id'] for node in canvas.get('nodes', []) if node.get('type') == 'start']
+    if start_node_id is None:
+        if len(start_ids) != 1:
+            raise ValueError(f"Expected exactly one Start node, found {len(start_ids)}. Pick one by id: {', '.join(start_ids)}")
+        start_node_id = start_ids[0]
+    elif start_node_id not in start_ids:
+        raise ValueError(f"No Start node with id '{start_node_id}'.")
+
+    return {
+        'start_node_id': start_node_id,
+        'nodes': canvas.get('nodes', []),
+        'connections': canvas.get('connections', []),
+    }
+
+
+# --- Macro File Storage ---
+class MacroStorage:
+    """
+    Saves canvases as a compact snapshot plus an append-only journal of
+    changes (path + '.journal', one JSON list of changes per line). Autosave
+    appends small diffs; once the journal holds COMPACT_AFTER_CHANGES changes
+    it is folded into a new snapshot.
+    """
+    def __init__(self, compact_after=COMPACT_AFTER_CHANGES):
+        self.compact_after = compact_after
+        self._journal_sizes = {} # path -> changes in its journal
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def journal_path(path):
+        return path + JOURNAL_SUFFIX
+
+    @classmethod
+    def signature(cls, path):
+        """
+        Returns ((mtime_ns, size) of the snapshot, (mtime_ns, size) of the
+        journal), with None for a missing file. It changes whenever load()
+        could return something different.
+        """
+        signature = []
+        for file_path in (path, cls.journal_path(path)):
+            try:
+                stat = os.stat(file_path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def save(self, path, canvas):
+        """ Writes a full snapshot and drops the journal it supersedes. """
+        with self._lock:
+            self._write_snapshot(path, canvas)
+
+    def load(self, path):
+        """ Returns the snapshot with every journaled change replayed on top. """
+        with self._lock:
+            canvas, changes = self._read(path)
+            return apply_changes(canvas, changes)
+
+    def append(self, path, changes):
+        """ Journals a list of changes, compacting the journal when it gets long. """
+        if not changes:
+            return
+        with self._lock:
+            with open(self.journal_path(path), 'ab') as f:
+                line = json.dumps(changes, separators=(',', ':')).encode('utf-8') + b'\n'
+                # Start on a fresh line if a crash cut the previous one short.
+                if f.tell() > 0:
+                    with open(self.journal_path(path), 'rb') as existing:
+                        existing.seek(-1, os.SEEK_END)
+                        if existing.read(1) != b'\n':
+                            line = b'\n' + line
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if path not in self._journal_sizes:
+                self._journal_sizes[path] = len(self._read(path)[1])
+            else:
+                self._journal_sizes[path] += len(changes)
+            if self._journal_sizes[path] >= self.compact_after:
+                self._compact(path)
+
+    def compact(self, path):
+        """ Folds the journal into a new snapshot. """
+        with self._lock:
+            self._compact(path)
+
+    def _compact(self, path):
+        canvas, changes = self._read(path)
+        if changes:
+            self._write_snapshot(path, apply_changes(canvas, changes))
+
+    def _write_snapshot(self, path, canvas):
+        # Snapshot first, journal second: a crash in between leaves a journal
+        # that replays cleanly onto the snapshot it was already folded into.
+        write_json_atomic(path, canvas)
+        try:
+            os.remove(self.journal_path(path))
+        except FileNotFoundError:
+            pass
+        self._journal_sizes[path] = 0
+
+    def _read(self, path):
+        """ Returns (snapshot, journaled changes). """
+        journal_path = self.journal_path(path)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                canvas = json.load(f)
+        elif os.path.exists(journal_path):
+            canvas = {} # Autosaved before the first full save
+        else:
+            raise FileNotFoundError(f"No such file: '{path}'")
+
+        changes = []
+        if os.path.exists(journal_path):
+            with open(journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        changes.extend(json.loads(line))
+                    except ValueError:
+                        # A crash mid-append leaves at most one partial last line.
+                        print(f"Skipping a damaged line in {journal_path}.")
+        return canvas, changes
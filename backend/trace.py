@@ -0,0 +1,96 @@
+import json
+import threading
+from collections import deque
+
+
+# --- Execution Trace Channel ---
+class TraceChannel:
+    """
+    Carries execution highlights from a runner to the editor. The runner only
+    appends to a bounded ring buffer; a background thread sends whatever has
+    accumulated to the frontend in one batch per display frame.
+    """
+    CLEAR = None # Event that clears this macro's node highlight
+
+    def __init__(self, window, macro_id=None, capacity=256, flush_interval=1 / 30):
+        self.window = window
+        self.macro_id = macro_id # Lets the editor keep one highlight per running macro
+        self.flush_interval = flush_interval
+        self.events = deque(maxlen=capacity) # Oldest events drop off when full
+        self._status = None # Latest run status not yet sent, e.g. loop throttling
+        self._closed = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """ Starts the background flusher. """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._thread.start()
+
+    def highlight(self, node_id):
+        """ Records that a node has started executing. Never blocks. """
+        self.events.append(node_id)
+
+    def clear(self):
+        """ Records that all node highlights should be removed. """
+        self.events.append(self.CLEAR)
+
+    def status(self, info):
+        """ Records the run's latest status. Only the newest one is sent. """
+        self._status = info
+
+    def close(self):
+        """ Stops the flusher and sends any events still in the buffer. """
+        self._closed.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def flush(self):
+        """ Sends all buffered events to the frontend in a single call. """
+        batch = []
+        while True:
+            try:
+                event = self.events.popleft()
+            except IndexError:
+                break
+            # Coalesce repeats, e.g. a one-node loop body highlighted many times.
+            if not batch or batch[-1] != event:
+                batch.append(event)
+        if batch:
+            try:
+                self.window.evaluate_js(f"window.applyExecutionTrace({json.dumps(self.macro_id)}, {json.dumps(batch)})")
+            except Exception as e:
+                print(f"Failed to send execution trace: {e}")
+
+        status, self._status = self._status, None
+        if status is not None:
+            try:
+                self.window.evaluate_js(f"window.applyMacroStatus({json.dumps(self.macro_id)}, {json.dumps(status)})")
+            except Exception as e:
+                print(f"Failed to send macro status: {e}")
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+
+class NullTrace:
+    """ Trace sink for runs without an editor. Discards every event. """
+    def start(self): pass
+    def highlight(self, node_id): pass
+    def clear(self): pass
+    def status(self, info): pass
+    def close(self): pass
+    def flush(self): pass
+
+
+class LoggingTrace(NullTrace):
+    """ Trace sink for runs without an editor. Prints each executed node. """
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def highlight(self, node_id):
+        node_type = self.nodes.get(node_id, {}).get('type', '?')
+        print(f"[trace] {node_id} ({node_type})")
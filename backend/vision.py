@@ -0,0 +1,278 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np # Make sure to install this: pip install numpy
+from PIL import Image # Make sure to install this: pip install pillow
+
+# --- Matching Parameters ---
+MIN_TEMPLATE_SIDE = 12 # Stop shrinking once the template would get smaller than this
+MIN_COARSE_SIDE = 8 # Smallest template side used when a large screen forces a deeper search
+MAX_PYRAMID_LEVELS = 4 # At most 16x downscaling for the coarse search
+COARSE_PIXEL_BUDGET = 640 * 360 # Go past MIN_TEMPLATE_SIDE while the coarse screen is bigger than this
+COARSE_CANDIDATES = 10 # Peaks from the coarse search that are refined at full size
+DEEP_CANDIDATES = 50 # Peaks refined when the coarse template is below MIN_TEMPLATE_SIDE
+REFINE_RADIUS = 2 # Pixels searched around a candidate at each finer level
+
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+# --- Image Helpers ---
+def to_grayscale(pixels):
+    """ Converts an RGB(A) or grayscale pixel array to float32 luminance. """
+    if pixels.ndim == 2:
+        return pixels.astype(np.float32, copy=False)
+    return pixels[..., :3].astype(np.float32) @ LUMA_WEIGHTS
+
+
+def downsample(image):
+    """ Halves an image in both directions by averaging 2x2 blocks. """
+    height, width = image.shape[0] // 2 * 2, image.shape[1] // 2 * 2
+    image = image[:height, :width]
+    # Strided adds are several times faster than a reshape-and-mean.
+    return (image[0::2, 0::2] + image[1::2, 0::2] + image[0::2, 1::2] + image[1::2, 1::2]) * 0.25
+
+
+def _fast_length(n):
+    """ Returns the smallest size >= n with only factors 2, 3 and 5 (fast for FFT). """
+    while True:
+        m = n
+        for factor in (2, 3, 5):
+            while m % factor == 0:
+                m //= factor
+        if m == 1:
+            return n
+        n += 1
+
+
+def _window_stats(image, height, width):
+    """ Returns the pixel sum and squared sum of every window, via integral images. """
+    image = image.astype(np.float64, copy=False)
+    sums = np.zeros((image.shape[0] + 1, image.shape[1] + 1))
+    squares = np.zeros_like(sums)
+    sums[1:, 1:] = image.cumsum(0).cumsum(1)
+    squares[1:, 1:] = (image * image).cumsum(0).cumsum(1)
+
+    def windows(table):
+        return table[height:, width:] - table[:-height, width:] - table[height:, :-width] + table[:-height, :-width]
+    return windows(sums), windows(squares)
+
+
+def _normalize(correlation, image, centered, norm):
+    """ Turns raw correlations into normalized cross-correlation scores in [-1, 1]. """
+    height, width = centered.shape
+    sums, squares = _window_stats(image, height, width)
+    variance = np.maximum(squares - sums * sums / centered.size, 0)
+    denominator = np.sqrt(variance) * norm
+    scores = np.zeros(correlation.shape)
+    np.divide(correlation, denominator, out=scores, where=denominator > 1e-6)
+    return scores
+
+
+def ncc_map(image, centered, norm):
+    """ Scores every placement of a zero-mean template over an image using FFTs. """
+    height, width = centered.shape
+    image_height, image_width = image.shape
+    shape = (_fast_length(image_height), _fast_length(image_width))
+    spectrum = np.fft.rfft2(image, shape) * np.fft.rfft2(centered[::-1, ::-1], shape)
+    full = np.fft.irfft2(spectrum, shape)
+    correlation = full[height - 1:image_height, width - 1:image_width]
+    return _normalize(correlation, image, centered, norm)
+
+
+def _refine(image, centered, norm, y, x, radius):
+    """ Re-scores a small neighbourhood around (y, x) directly and returns the best spot. """
+    height, width = centered.shape
+    max_y, max_x = image.shape[0] - height, image.shape[1] - width
+    y0, y1 = min(max(y - radius, 0), max_y), min(max(y + radius, 0), max_y)
+    x0, x1 = min(max(x - radius, 0), max_x), min(max(x + radius, 0), max_x)
+    patch = image[y0:y1 + height, x0:x1 + width]
+
+    windows = np.lib.stride_tricks.sliding_window_view(patch, (height, width))
+    correlation = np.tensordot(windows, centered, axes=((2, 3), (0, 1)))
+    scores = _normalize(correlation, patch, centered, norm)
+    best_y, best_x = np.unravel_index(int(np.argmax(scores)), scores.shape)
+    return y0 + int(best_y), x0 + int(best_x), float(scores[best_y, best_x])
+
+
+def _top_peaks(scores, count, radius):
+    """ Picks the highest scores, blanking out the area around each one it takes. """
+    scores = scores.copy()
+    peaks = []
+    for _ in range(count):
+        y, x = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        if scores[y, x] == -np.inf:
+            break
+        peaks.append((int(y), int(x)))
+        scores[max(y - radius, 0):y + radius + 1, max(x - radius, 0):x + radius + 1] = -np.inf
+    return peaks
+
+
+# --- Color and Change Detection ---
+def parse_color(value):
+    """ Parses '#RRGGBB', 'RRGGBB' or 'r, g, b' into an (r, g, b) int16 array. """
+    text = str(value).strip()
+    try:
+        if ',' in text:
+            channels = [int(float(part)) for part in text.split(',')]
+        else:
+            hex_digits = text.lstrip('#')
+            if len(hex_digits) != 6:
+                raise ValueError
+            channels = [int(hex_digits[i:i + 2], 16) for i in (0, 2, 4)]
+    except ValueError:
+        raise ValueError(f"Invalid color '{value}'. Use #RRGGBB or R, G, B.") from None
+    if len(channels) != 3 or not all(0 <= c <= 255 for c in channels):
+        raise ValueError(f"Invalid color '{value}'. Use #RRGGBB or R, G, B.")
+    return np.array(channels, dtype=np.int16)
+
+
+def color_mask(pixels, color, tolerance):
+    """ Returns which pixels are within tolerance of color on every channel. """
+    if pixels.ndim == 2:
+        return np.abs(pixels.astype(np.float32) - float(color @ LUMA_WEIGHTS)) <= tolerance
+    if pixels.dtype != np.uint8:
+        return np.abs(pixels[..., :3].astype(np.float32) - color).max(axis=-1) <= tolerance
+
+    # Per channel, lo <= value <= hi is the same as (value - lo) <= (hi - lo)
+    # in wrapping uint8 arithmetic: one subtract and one compare, no widening.
+    tolerance = int(tolerance) # Channels are whole numbers, so a fractional tolerance rounds down
+    low = np.clip(color - tolerance, 0, 255).astype(np.uint8)
+    span = np.clip(color + tolerance, 0, 255).astype(np.uint8) - low
+    mask = None
+    for channel in range(3):
+        within = (pixels[..., channel] - low[channel]) <= span[channel]
+        mask = within if mask is None else mask & within
+    return mask
+
+
+def find_color(pixels, color, tolerance):
+    """ Returns the (x, y) of the first pixel within tolerance of color, or None. """
+    mask = color_mask(pixels, color, tolerance)
+    if mask.size == 0: # The region is empty or fully off-screen
+        return None
+    index = int(mask.argmax()) # First True in row-major order
+    if not mask.flat[index]:
+        return None
+    y, x = divmod(index, mask.shape[1])
+    return x, y
+
+
+def mean_difference(a, b):
+    """ Returns the mean absolute difference between two images of the same shape. """
+    if a is b:
+        return 0.0 # The same frame, e.g. on a static screen
+    if a.shape != b.shape:
+        return float('inf') # The region was clipped differently, so treat it as changed
+    return float(np.abs(a.astype(np.float32, copy=False) - b.astype(np.float32, copy=False)).mean())
+
+
+# --- Template Matching ---
+class Template:
+    """
+    A decoded search image, prepared once at every pyramid level. Levels down
+    to MIN_TEMPLATE_SIDE are always searched; the smaller ones after them, down
+    to MIN_COARSE_SIDE, are only used to keep the coarse search on large
+    screens within COARSE_PIXEL_BUDGET.
+    """
+    def __init__(self, pixels):
+        gray = to_grayscale(pixels)
+        self.height, self.width = gray.shape
+
+        def level_limit(min_side):
+            count = 0
+            while count < MAX_PYRAMID_LEVELS and min(self.height, self.width) >> (count + 1) >= min_side:
+                count += 1
+            return count
+
+        self.base_levels = level_limit(MIN_TEMPLATE_SIDE) + 1
+        level_count = level_limit(MIN_COARSE_SIDE)
+
+        # Each level holds the zero-mean template and its norm, as the
+        # normalized cross-correlation needs both for every placement.
+        self.levels = []
+        current = gray
+        for level in range(level_count + 1):
+            if level:
+                current = downsample(current)
+            centered = current - current.mean()
+            self.levels.append((centered, float(np.sqrt((centered * centered).sum()))))
+
+
+def find_template(screen, template, threshold):
+    """
+    Searches a grayscale screen image for a template. Scores every position at
+    the coarsest pyramid level, then refines the best few candidates level by
+    level. Returns (center x, center y, score) or None if nothing reaches the
+    threshold (0-1).
+
+    Small templates can't shrink far, so a full 4K screen still takes around
+    100 ms for a 32x32 template; give such nodes a search region when they
+    need to poll at frame rate.
+    """
+    if screen.shape[0] < template.height or screen.shape[1] < template.width:
+        return None
+
+    pyramid = [screen]
+    for level in range(1, len(template.levels)):
+        if level >= template.base_levels and pyramid[-1].size <= COARSE_PIXEL_BUDGET:
+            break
+        next_level = downsample(pyramid[-1])
+        centered = template.levels[level][0]
+        if next_level.shape[0] < centered.shape[0] or next_level.shape[1] < centered.shape[1]:
+            break
+        pyramid.append(next_level)
+    top = len(pyramid) - 1
+
+    coarse_centered, coarse_norm = template.levels[top]
+    coarse_scores = ncc_map(pyramid[top], coarse_centered, coarse_norm)
+    radius = max(min(coarse_centered.shape) // 2, 1)
+    # Tiny coarse templates are less distinctive, so more of their peaks are checked.
+    candidates = COARSE_CANDIDATES if top < template.base_levels else DEEP_CANDIDATES
+
+    best = None
+    for y, x in _top_peaks(coarse_scores, candidates, radius):
+        score = float(coarse_scores[y, x])
+        for level in range(top - 1, -1, -1):
+            centered, norm = template.levels[level]
+            y, x, score = _refine(pyramid[level], centered, norm, y * 2, x * 2, REFINE_RADIUS)
+        if best is None or score > best[2]:
+            best = (y, x, score)
+
+    if best is None or best[2] < threshold:
+        return None
+    y, x, score = best
+    return x + template.width // 2, y + template.height // 2, score
+
+
+class TemplateCache:
+    """
+    Decoded templates keyed by image path. An entry is reused while the file's
+    modification time is unchanged, so polling loops never touch the disk.
+    """
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # path -> (mtime, Template)
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == mtime:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        with Image.open(path) as image:
+            template = Template(np.asarray(image.convert('L')))
+
+        with self._lock:
+            self._entries[path] = (mtime, template)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return template
+
+
+# Shared across runs so a template is decoded only once per file version.
+template_cache = TemplateCache()
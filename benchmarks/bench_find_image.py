@@ -0,0 +1,54 @@
+"""
+Benchmarks the find_image template matcher on synthetic screen frames.
+
+Run from the repository root:
+    python -m benchmarks.bench_find_image
+"""
+import time
+
+import numpy as np
+
+from backend.vision import Template, find_template
+
+FRAME_SIZES = {'1080p': (1080, 1920), '4K': (2160, 3840)}
+TEMPLATE_SIZES = [(32, 32), (64, 128), (200, 200)]
+ITERATIONS = 20
+
+
+def synthetic_frame(rng, height, width):
+    """ Builds a desktop-like frame: smooth gradients with fine noise on top. """
+    coarse = rng.uniform(0, 255, (height // 16 + 1, width // 16 + 1)).astype(np.float32)
+    frame = np.repeat(np.repeat(coarse, 16, axis=0), 16, axis=1)[:height, :width]
+    return frame + rng.normal(0, 12, (height, width)).astype(np.float32)
+
+
+def bench(frame, template_size, rng):
+    height, width = template_size
+    y = int(rng.integers(0, frame.shape[0] - height))
+    x = int(rng.integers(0, frame.shape[1] - width))
+    template = Template(frame[y:y + height, x:x + width].copy())
+
+    timings = []
+    match = None
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        match = find_template(frame, template, 0.8)
+        timings.append(time.perf_counter() - start)
+
+    found = match is not None and (match[0], match[1]) == (x + width // 2, y + height // 2)
+    return np.median(timings) * 1000, found
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'frame':>6} {'template':>10} {'median ms':>10} {'fps':>8}  correct")
+    for name, (height, width) in FRAME_SIZES.items():
+        frame = synthetic_frame(rng, height, width)
+        for template_size in TEMPLATE_SIZES:
+            median_ms, found = bench(frame, template_size, rng)
+            label = f"{template_size[1]}x{template_size[0]}"
+            print(f"{name:>6} {label:>10} {median_ms:10.2f} {1000 / median_ms:8.1f}  {found}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmarks the backend's share of hotkey trigger latency: from the hotkey
+firing to a runner being ready, for a macro started from the prepared-macro
+cache versus one the editor serializes on request. The editor path is timed
+from the JSON the bridge would carry, so it leaves out the frontend's own
+DOM walk and the evaluate_js round-trip; the real gap is larger.
+
+Run from the repository root:
+    python -m benchmarks.bench_hotkey_trigger
+"""
+import json
+import statistics
+import time
+
+from backend.executor import MacroRunner, PreparedMacroCache
+from backend.trace import NullTrace
+from benchmarks.bench_interpreter import FakeInput, FakeWindow, math_chain
+
+SIZES = [10, 100, 1000, 5000]
+TRIGGERS = 50
+
+
+def editor_node(node, index):
+    """ Adds the layout fields the editor saves with every node. """
+    return dict(node, left=f"{index * 40}px", top=f"{index * 25}px", width='', height='', color='default')
+
+
+def editor_trigger(macro_json):
+    """ Old path: the macro arrives as JSON from the editor and is compiled for this run. """
+    macro_data = json.loads(macro_json)
+    return MacroRunner(macro_data, FakeWindow(), trace=NullTrace(), input_backend=FakeInput())
+
+
+def prepared_trigger(prepared, start_node_id):
+    """ New path: the compiled macro is looked up by start node id. """
+    macro_data, plan = prepared.get(start_node_id)
+    return MacroRunner(macro_data, FakeWindow(), trace=NullTrace(), input_backend=FakeInput(), plan=plan)
+
+
+def median_ms(trigger):
+    timings = []
+    for _ in range(TRIGGERS):
+        start = time.perf_counter()
+        trigger()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    print(f"{'nodes':>6} {'editor ms':>10} {'prepared ms':>12} {'speedup':>8} {'prepare ms':>11}")
+    for size in SIZES:
+        macro = math_chain(size)
+        macro['nodes'] = [editor_node(node, i) for i, node in enumerate(macro['nodes'])]
+        macro_json = json.dumps(macro)
+
+        prepared = PreparedMacroCache(MacroRunner.EXEC_HANDLERS, MacroRunner.DATA_EVALUATORS)
+        start = time.perf_counter()
+        prepared.update([macro])
+        prepare_ms = (time.perf_counter() - start) * 1000
+        start_node_id = macro['start_node_id']
+
+        editor = median_ms(lambda: editor_trigger(macro_json))
+        cached = median_ms(lambda: prepared_trigger(prepared, start_node_id))
+        print(f"{size:>6} {editor:10.3f} {cached:12.3f} {editor / cached:7.1f}x {prepare_ms:11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""
+Benchmarks the macro interpreter (MacroRunner) on generated macros, from 10
+to 50k nodes, against a fake window and a fake input backend.
+
+Run from the repository root:
+    python -m benchmarks.bench_interpreter
+    python -m benchmarks.bench_interpreter --sizes 10 1000 --output new.json --compare old.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from backend.executor import MacroRunner
+from backend.input import InputBackend
+from backend.profiler import percentile
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 50000]
+TARGET_SECONDS = 2.0 # Rough time budget per workload and size; sets the number of passes
+
+
+# --- Fakes ---
+class FakeWindow:
+    """ Stands in for the pywebview window; swallows trace batches. """
+    def __init__(self):
+        self.calls = 0
+
+    def evaluate_js(self, script):
+        self.calls += 1
+
+
+class FakeInput(InputBackend):
+    """ Stands in for the input backend; counts actions without touching the OS. """
+    def __init__(self):
+        self.actions = 0
+
+    def position(self):
+        return 0, 0
+
+    def _record(self, *args):
+        self.actions += 1
+
+    move_to = click = mouse_down = mouse_up = scroll = key_down = key_up = press = hotkey = type_text = _record
+
+
+class CountingRunner(MacroRunner):
+    """ MacroRunner that counts node executions and data-pin reads. """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.executed_nodes = 0
+        self.data_evaluations = 0
+
+    def execute_node(self, node):
+        self.executed_nodes += 1
+        return super().execute_node(node)
+
+    def evaluate_output_pin(self, node_id, pin_name):
+        self.data_evaluations += 1
+        return super().evaluate_output_pin(node_id, pin_name)
+
+
+# --- Macro Generators ---
+class MacroBuilder:
+    def __init__(self):
+        self.nodes = []
+        self.connections = []
+        self.add('start', {'Turbo Mode': True})
+
+    def add(self, node_type, values=None):
+        node_id = f"node-{len(self.nodes)}"
+        self.nodes.append({'id': node_id, 'type': node_type, 'values': values or {}})
+        return node_id
+
+    def exec_wire(self, start, pin, end):
+        self.connections.append({'startNodeId': start, 'startPinName': pin, 'endNodeId': end, 'endPinName': 'exec', 'flow': 'exec'})
+
+    def data_wire(self, start, pin, end, end_pin):
+        self.connections.append({'startNodeId': start, 'startPinName': pin, 'endNodeId': end, 'endPinName': end_pin, 'flow': 'data'})
+
+    def chain(self, after, pin, count):
+        """ Appends a chain of key presses and returns the last node. """
+        previous = after
+        for _ in range(count):
+            node_id = self.add('key_press', {'Key': {'display': 'A', 'pynput': 'a'}})
+            self.exec_wire(previous, pin, node_id)
+            previous, pin = node_id, 'exec'
+        return previous
+
+    def macro(self):
+        return {'start_node_id': 'node-0', 'nodes': self.nodes, 'connections': self.connections}
+
+
+def linear_chain(size):
+    """ Start followed by a straight chain of key presses. """
+    builder = MacroBuilder()
+    builder.chain('node-0', 'exec', size - 1)
+    return builder.macro()
+
+
+def nested_loops(size):
+    """
+    For loop -> While loop -> For loop -> chain. The while condition is true
+    exactly once per outer pass, so every level really loops.
+    """
+    outer_passes = 4
+    builder = MacroBuilder()
+    outer = builder.add('loop', {'Iterations': outer_passes})
+    builder.exec_wire('node-0', 'exec', outer)
+
+    while_loop = builder.add('while_loop')
+    builder.exec_wire(outer, 'Loop Body', while_loop)
+    inner = builder.add('loop')
+    builder.exec_wire(while_loop, 'Loop Body', inner)
+    plus_one = builder.add('math', {'Operator': 'add', 'B': 1})
+    builder.data_wire(outer, 'Index', plus_one, 'A')
+    builder.data_wire(plus_one, 'Result', inner, 'Iterations') # Outer Index + 1 passes
+
+    # Loop again until the inner loop's last Index catches up with the outer Index.
+    condition = builder.add('compare', {'Type': 'number', 'Operator': '!=', 'A': -1})
+    builder.data_wire(inner, 'Index', condition, 'A')
+    builder.data_wire(outer, 'Index', condition, 'B')
+    builder.data_wire(condition, 'Result', while_loop, 'Condition')
+
+    builder.chain(inner, 'Loop Body', max(size - len(builder.nodes), 1))
+    return builder.macro()
+
+
+def math_chain(size):
+    """ A loop whose body types the result of a deep math chain fed by the loop Index. """
+    builder = MacroBuilder()
+    loop = builder.add('loop', {'Iterations': 10})
+    builder.exec_wire('node-0', 'exec', loop)
+    sink = builder.add('type_string', {'Delay': 0})
+    builder.exec_wire(loop, 'Loop Body', sink)
+
+    previous, pin = loop, 'Index'
+    for _ in range(max(size - len(builder.nodes), 1)):
+        node_id = builder.add('math', {'Operator': 'add', 'B': 1})
+        builder.data_wire(previous, pin, node_id, 'A')
+        previous, pin = node_id, 'Result'
+    builder.data_wire(previous, pin, sink, 'Text')
+    return builder.macro()
+
+
+def compare_fan_in(size):
+    """
+    A loop whose body branches on many compares of the loop Index, summed
+    pairwise by a tree of math nodes into one if statement.
+    """
+    builder = MacroBuilder()
+    loop = builder.add('loop', {'Iterations': 10})
+    builder.exec_wire('node-0', 'exec', loop)
+    branch = builder.add('if_statement')
+    builder.exec_wire(loop, 'Loop Body', branch)
+
+    leaves = max((size - len(builder.nodes)) // 2, 1)
+    level = []
+    for i in range(leaves):
+        node_id = builder.add('compare', {'Type': 'number', 'Operator': '>=', 'B': i})
+        builder.data_wire(loop, 'Index', node_id, 'A')
+        level.append(node_id)
+    while len(level) > 1:
+        next_level = []
+        for i in range(0, len(level) - 1, 2):
+            node_id = builder.add('math', {'Operator': 'add'})
+            builder.data_wire(level[i], 'Result', node_id, 'A')
+            builder.data_wire(level[i + 1], 'Result', node_id, 'B')
+            next_level.append(node_id)
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+    builder.data_wire(level[0], 'Result', branch, 'Condition')
+    return builder.macro()
+
+
+WORKLOADS = {
+    'linear_chain': linear_chain,
+    'nested_loops': nested_loops,
+    'math_chain': math_chain,
+    'compare_fan_in': compare_fan_in,
+}
+
+
+# --- Measurement ---
+def make_runner(macro):
+    runner = CountingRunner(macro, FakeWindow(), input_backend=FakeInput())
+    # Run passes directly instead of through run(), so each one can be timed.
+    runner.is_running = True
+    runner.turbo = True
+    return runner
+
+
+def run_pass(runner, start_node_id):
+    # Every pass starts from fresh loop state, like a new run would.
+    runner.node_outputs.clear()
+    runner.value_cache.clear()
+    runner.run_pass(start_node_id)
+
+
+def measure(workload, size):
+    macro = WORKLOADS[workload](size)
+    start_node_id = macro['start_node_id']
+
+    compile_start = time.perf_counter()
+    runner = make_runner(macro)
+    compile_ms = (time.perf_counter() - compile_start) * 1000
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        # Warm-up pass, which also tells how many passes fit the budget.
+        warmup_start = time.perf_counter()
+        run_pass(runner, start_node_id)
+        warmup = time.perf_counter() - warmup_start
+        passes = max(3, min(200, int(TARGET_SECONDS / max(warmup, 1e-6))))
+        runner.executed_nodes = runner.data_evaluations = 0
+
+        latencies = []
+        total_start = time.perf_counter()
+        for _ in range(passes):
+            pass_start = time.perf_counter()
+            run_pass(runner, start_node_id)
+            latencies.append(time.perf_counter() - pass_start)
+        total = time.perf_counter() - total_start
+        latencies.sort()
+
+        # Peak memory is measured separately; tracing slows the run itself down.
+        tracemalloc.start()
+        memory_runner = make_runner(macro)
+        run_pass(memory_runner, start_node_id)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    runner.trace.close()
+    memory_runner.trace.close()
+
+    return {
+        'workload': workload,
+        'nodes': len(macro['nodes']),
+        'passes': passes,
+        'compile_ms': compile_ms,
+        'nodes_per_s': runner.executed_nodes / total,
+        'data_evals_per_s': runner.data_evaluations / total,
+        'pass_p50_ms': statistics.median(latencies) * 1000,
+        'pass_p90_ms': percentile(latencies, 0.9) * 1000,
+        'pass_p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def print_table(results, baseline=None):
+    header = f"{'workload':<15}{'nodes':>7}{'nodes/s':>12}{'evals/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak KB':>10}"
+    if baseline:
+        header += f"{'vs base':>9}"
+    print(header)
+    base = {(r['workload'], r['nodes']): r for r in (baseline or [])}
+    for r in results:
+        line = (f"{r['workload']:<15}{r['nodes']:>7}{r['nodes_per_s']:>12.0f}{r['data_evals_per_s']:>12.0f}"
+                f"{r['pass_p50_ms']:>10.2f}{r['pass_p99_ms']:>10.2f}{r['peak_memory_kb']:>10.0f}")
+        previous = base.get((r['workload'], r['nodes']))
+        if previous:
+            line += f"{previous['pass_p50_ms'] / r['pass_p50_ms']:>8.2f}x"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the MacroBot interpreter.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Node counts to generate.")
+    parser.add_argument('--workloads', nargs='+', choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument('--output', default='bench_interpreter.json', help="Where to write the JSON results.")
+    parser.add_argument('--compare', help="A previous results file to compare against (speedup of median pass time).")
+    args = parser.parse_args(argv)
+
+    results = [measure(workload, size) for workload in args.workloads for size in args.sizes]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)['results']
+    print_table(results, baseline)
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'results': results,
+        }, f, indent=4)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
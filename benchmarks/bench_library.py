@@ -0,0 +1,77 @@
+"""
+Benchmarks the macro library index on a folder of synthetic macro files:
+the first scan, a rescan with nothing changed, a rescan after a few edits,
+and query latency.
+
+Run from the repository root:
+    python -m benchmarks.bench_library [file count]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from backend.library import MacroLibrary
+from backend.storage import write_json_atomic
+
+NODE_TYPES = ['delay', 'mouse_click', 'mouse_move', 'key_press', 'type_string', 'find_image', 'loop', 'if_statement', 'math']
+QUERY_REPEATS = 200
+
+
+def synthetic_macro(rng, index):
+    """ A canvas with one hotkeyed Start node and 20-200 other nodes. """
+    key = 'abcdefghijklmnopqrstuvwxyz'[index % 26]
+    nodes = [{'id': 'node-0', 'type': 'start',
+              'values': {'Hotkey': {'display': f'Ctrl + Alt + {key.upper()}', 'pynput': f'<ctrl>+<alt>+{key}'}}}]
+    for i in range(1, rng.randint(20, 200)):
+        node = {'id': f'node-{i}', 'type': rng.choice(NODE_TYPES), 'values': {'Duration': rng.random()}}
+        if node['type'] == 'find_image':
+            node['imagePath'] = f'C:/images/button-{rng.randint(0, 50)}.png'
+        nodes.append(node)
+    return {'nodes': nodes, 'connections': [], 'panX': 0, 'panY': 0, 'scale': 1, 'nodeIdCounter': len(nodes)}
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:<28} {(time.perf_counter() - start) * 1000:10.1f} ms  {result}")
+    return result
+
+
+def query_ms(function):
+    start = time.perf_counter()
+    for _ in range(QUERY_REPEATS):
+        function()
+    return (time.perf_counter() - start) / QUERY_REPEATS * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the macro library index.")
+    parser.add_argument('count', nargs='?', type=int, default=2000, help="How many synthetic macro files to index.")
+    count = parser.parse_args(argv).count
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        for i in range(count):
+            path = os.path.join(folder, f'macro-{i:05}.macro')
+            write_json_atomic(path, synthetic_macro(rng, i))
+            paths.append(path)
+
+        library = MacroLibrary(os.path.join(folder, 'library.db'))
+        print(f"{count} macro files")
+        timed('first scan', lambda: library.scan([folder]))
+        timed('rescan, nothing changed', library.scan)
+        for path in rng.sample(paths, 10):
+            write_json_atomic(path, synthetic_macro(rng, 0))
+        timed('rescan, 10 files edited', library.scan)
+
+        print(f"{'find_by_hotkey':<28} {query_ms(lambda: library.find_by_hotkey('<ctrl>+<alt>+q')):10.3f} ms")
+        print(f"{'find_by_image (name)':<28} {query_ms(lambda: library.find_by_image('button-7.png')):10.3f} ms")
+        print(f"{'find_by_node_type':<28} {query_ms(lambda: library.find_by_node_type('loop')):10.3f} ms")
+        print(f"{'hotkeys':<28} {query_ms(library.hotkeys):10.3f} ms")
+        library.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures how long importing run.py takes in a fresh interpreter, i.e. the
+time before the editor window can be created, and lists the slowest imports.
+The app itself logs its startup milestones ("Startup: ... after N ms") and
+returns them from Api.get_startup_timings().
+
+Run from the repository root:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 20 --top 15
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+IMPORT_SCRIPT = "import time; start = time.perf_counter(); import run; print(time.perf_counter() - start)"
+
+
+def time_import(runs):
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def slowest_imports(top):
+    """ Returns (cumulative ms, module) for the top-level imports that took longest. """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import run'], capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Only direct imports of run.py, which are indented one level below it.
+        if not name.startswith('   ') or name.startswith('    '):
+            continue
+        entries.append((int(cumulative) / 1000, name.strip()))
+    entries.sort(reverse=True)
+    return entries[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure MacroBot's startup import time.")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10, help="How many of the slowest imports to list.")
+    args = parser.parse_args(argv)
+
+    try:
+        timings = time_import(args.runs)
+    except RuntimeError as e:
+        print(f"Importing run.py failed: {e}")
+        return 1
+
+    print(f"import run: median {statistics.median(timings) * 1000:.0f} ms, "
+          f"min {min(timings) * 1000:.0f} ms over {args.runs} runs")
+    print(f"\n{'cumulative ms':>14}  module")
+    for cumulative_ms, name in slowest_imports(args.top):
+        print(f"{cumulative_ms:>14.1f}  {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
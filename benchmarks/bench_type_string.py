@@ -0,0 +1,111 @@
+"""
+Benchmarks the type_string node's typing modes in characters per second,
+against a fake input backend that charges a fixed cost per key event.
+
+Run from the repository root:
+    python -m benchmarks.bench_type_string
+    python -m benchmarks.bench_type_string --chars 5000 --event-cost-us 20
+"""
+import argparse
+import contextlib
+import os
+import time
+
+from backend.executor import MacroRunner
+from backend.input import InputBackend
+from backend.trace import NullTrace
+
+SAMPLE = "Dear customer, thank you for your order №{n} — déjà vu, naïve café ✓\n"
+
+
+class FakeInput(InputBackend):
+    """
+    Counts calls and characters. Every key event costs event_cost seconds of
+    busy time, roughly what sending one OS input event takes.
+    """
+    def __init__(self, event_cost):
+        self.event_cost = event_cost
+        self.calls = 0
+        self.chars = 0
+        self.clipboard = ''
+
+    def _events(self, count):
+        self.calls += 1
+        deadline = time.perf_counter() + self.event_cost * count
+        while time.perf_counter() < deadline:
+            pass
+
+    def position(self): return 0, 0
+    def move_to(self, x, y): self._events(1)
+    def click(self, button, clicks=1): self._events(2 * clicks)
+    def mouse_down(self, button): self._events(1)
+    def mouse_up(self, button): self._events(1)
+    def scroll(self, amount): self._events(1)
+    def key_down(self, key): self._events(1)
+    def key_up(self, key): self._events(1)
+
+    def type_text(self, text):
+        self.chars += len(text)
+        self._events(2 * len(text)) # Key down and key up per character
+
+    def type_unicode(self, text):
+        self.chars += len(text)
+        self._events(2 * len(text))
+
+    def paste(self):
+        self.chars += len(self.clipboard)
+        self._events(4) # Ctrl down, V down, V up, Ctrl up
+
+    def get_clipboard(self): return self.clipboard
+    def set_clipboard(self, text): self.clipboard = text
+
+
+def make_text(chars):
+    text = ''
+    n = 0
+    while len(text) < chars:
+        text += SAMPLE.format(n=n)
+        n += 1
+    return text[:chars]
+
+
+def measure(mode, text, delay_ms, event_cost):
+    macro = {
+        'start_node_id': 'start',
+        'nodes': [
+            {'id': 'start', 'type': 'start', 'values': {'Turbo Mode': True}},
+            {'id': 'type', 'type': 'type_string', 'values': {'Text': text, 'Mode': mode, 'Delay': delay_ms}},
+        ],
+        'connections': [{'startNodeId': 'start', 'startPinName': 'exec', 'endNodeId': 'type', 'endPinName': 'exec', 'flow': 'exec'}],
+    }
+    backend = FakeInput(event_cost)
+    runner = MacroRunner(macro, None, trace=NullTrace(), input_backend=backend)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        runner.run()
+        elapsed = time.perf_counter() - start
+    return elapsed, backend
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark type_string throughput.")
+    parser.add_argument('--chars', type=int, default=5000, help="Text length for the bulk modes.")
+    parser.add_argument('--per-char-chars', type=int, default=200, help="Text length for per-character mode, which is slow by design.")
+    parser.add_argument('--delay-ms', type=float, default=5, help="Delay between characters in per-character mode.")
+    parser.add_argument('--event-cost-us', type=float, default=20, help="Simulated cost of one OS key event.")
+    args = parser.parse_args(argv)
+
+    event_cost = args.event_cost_us / 1e6
+    runs = [
+        ('per_character', make_text(args.per_char_chars)),
+        ('unicode', make_text(args.chars)),
+        ('paste', make_text(args.chars)),
+    ]
+    print(f"{'mode':<15}{'chars':>7}{'seconds':>10}{'chars/s':>12}{'calls':>8}")
+    for mode, text in runs:
+        elapsed, backend = measure(mode, text, args.delay_ms, event_cost)
+        print(f"{mode:<15}{backend.chars:>7}{elapsed:>10.3f}{backend.chars / elapsed:>12.0f}{backend.calls:>8}")
+
+
+if __name__ == '__main__':
+    main()
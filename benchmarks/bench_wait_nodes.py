@@ -0,0 +1,67 @@
+"""
+Benchmarks the checks behind the pixel_color and region_change nodes on
+synthetic screen frames, in checks per second.
+
+Run from the repository root:
+    python -m benchmarks.bench_wait_nodes
+"""
+import time
+
+import numpy as np
+
+from backend.capture import ScreenCapture, SyntheticCaptureBackend
+from backend.vision import find_color, mean_difference, parse_color, to_grayscale
+
+FRAME_SIZE = (1080, 1920)
+REGIONS = {'1x1': (500, 500, 1, 1), '100x100': (500, 500, 100, 100), '400x300': (500, 500, 400, 300), 'full': None}
+DURATION = 0.5 # Seconds each case runs for
+
+
+def synthetic_frames(rng, count):
+    """ Desktop-like RGB frames that differ slightly from one another. """
+    base = rng.integers(0, 256, (FRAME_SIZE[0] // 16 + 1, FRAME_SIZE[1] // 16 + 1, 3), dtype=np.uint8)
+    base = np.repeat(np.repeat(base, 16, axis=0), 16, axis=1)[:FRAME_SIZE[0], :FRAME_SIZE[1]]
+    frames = []
+    for _ in range(count):
+        frame = base.copy()
+        frame[rng.integers(0, FRAME_SIZE[0], 500), rng.integers(0, FRAME_SIZE[1], 500)] = 255
+        frames.append(frame)
+    return frames
+
+
+def checks_per_second(check):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        check()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    frames = synthetic_frames(rng, 8)
+    color = parse_color('#00ff00')
+    next_frame = iter(frames * 1000000).__next__
+    capture = ScreenCapture(SyntheticCaptureBackend(next_frame))
+
+    print(f"{'region':>8} {'pixel/s':>10} {'change/s':>10} {'poll/s':>10}")
+    for name, region in REGIONS.items():
+        current = ScreenCapture.crop(frames[0], region)
+        previous_gray = to_grayscale(ScreenCapture.crop(frames[1], region))
+
+        pixel_rate = checks_per_second(lambda: find_color(current, color, 10))
+        change_rate = checks_per_second(lambda: mean_difference(previous_gray, to_grayscale(current)))
+
+        # A full wait-mode poll: fresh capture, crop, color check and change check.
+        def poll():
+            capture.invalidate()
+            pixels = capture.grab(region)
+            find_color(pixels, color, 10)
+            mean_difference(previous_gray, to_grayscale(pixels))
+        poll_rate = checks_per_second(poll)
+        print(f"{name:>8} {pixel_rate:10.0f} {change_rate:10.0f} {poll_rate:10.0f}")
+
+
+if __name__ == '__main__':
+    main()
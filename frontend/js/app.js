@@ -24,6 +24,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const settingsModalClose = document.getElementById('settings-modal-close');
     const themeSwitcher = document.getElementById('theme-switcher');
     const disableErrorsCheckbox = document.getElementById('disable-errors-checkbox');
+    const autosaveCheckbox = document.getElementById('autosave-checkbox');
     const emergencyStopRecorder = document.getElementById('emergency-stop-recorder');
     const undoRecorder = document.getElementById('undo-recorder');
     const redoRecorder = document.getElementById('redo-recorder');
@@ -35,6 +36,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const saveBtn = document.getElementById('save-btn');
     const importBtn = document.getElementById('import-btn');
     const validateBtn = document.getElementById('validate-btn');
+    const recordBtn = document.getElementById('record-btn');
     const undoBtn = document.getElementById('undo-btn');
     const redoBtn = document.getElementById('redo-btn');
     const infoBtn = document.getElementById('info-btn');
@@ -71,6 +73,10 @@ document.addEventListener('DOMContentLoaded', () => {
     let historyIndex = -1;
     let minimapBounds = { minX: 0, minY: 0, maxX: 0, maxY: 0 };
     let isDraggingMinimap = false;
+    let currentFilePath = null; // File the canvas was last saved to or imported from
+    let persistedCanvas = null; // Canvas state as last written to currentFilePath
+    let autosaveTimer = null;
+    const imagePreviews = new Map(); // Image path -> promise of its thumbnail, shared by every node using it
 
 
     // --- Settings State ---
@@ -78,6 +84,7 @@ document.addEventListener('DOMContentLoaded', () => {
         general: {
             theme: 'dark',
             showErrors: true,
+            autosave: false,
         },
         canvas: {
             snapToGrid: false,
@@ -102,7 +109,12 @@ document.addEventListener('DOMContentLoaded', () => {
             execOutputs: [{ name: 'exec' }],
             params: [
                 { name: 'Hotkey', type: 'key_recorder', defaultValue: 'Not Set' },
-                { name: 'Loop Continuously', type: 'checkbox', defaultValue: false }
+                { name: 'Loop Continuously', type: 'checkbox', defaultValue: false },
+                { name: 'Loop Timing', type: 'select', defaultValue: 'after_each_pass', options: ['After Each Pass', 'Fixed Rate'] },
+                { name: 'Rate', type: 'number', defaultValue: 1, min: 0.01, max: 1000, condition: 'Loop Timing', conditionValue: 'fixed_rate' },
+                { name: 'Turbo Mode', type: 'checkbox', defaultValue: false },
+                { name: 'Loop Guard', type: 'select', defaultValue: 'adaptive', options: ['Adaptive', 'Cap', 'Off'] },
+                { name: 'Max Idle Rate', type: 'number', defaultValue: 1000, min: 1, max: 100000, condition: 'Loop Guard', conditionValue: 'cap' }
             ]
         },
         {
@@ -184,10 +196,11 @@ document.addEventListener('DOMContentLoaded', () => {
             execOutputs: [{ name: 'exec' }],
             dataInputs: [
                 { name: 'Text', type: 'string', defaultValue: 'Hello, world!' },
-                { name: 'Delay', type: 'number', defaultValue: 50, min: 0.01, max: 9999 }
+                { name: 'Delay', type: 'number', defaultValue: 50, min: 0.01, max: 9999, condition: 'Mode', conditionValue: 'per_character' }
             ],
             params: [
-                 { name: 'Unit', type: 'select', defaultValue: 'milliseconds', options: ['Milliseconds', 'Seconds'] }
+                 { name: 'Mode', type: 'select', defaultValue: 'per_character', options: ['Per Character', 'Paste', 'Unicode'] },
+                 { name: 'Unit', type: 'select', defaultValue: 'milliseconds', options: ['Milliseconds', 'Seconds'], condition: 'Mode', conditionValue: 'per_character' }
             ]
         },
         {
@@ -201,13 +214,68 @@ document.addEventListener('DOMContentLoaded', () => {
             ],
             dataInputs: [
                 { name: 'Image', type: 'image_selector' },
-                { name: 'Confidence', type: 'number', defaultValue: 80, min: 1, max: 100 }
+                { name: 'Confidence', type: 'number', defaultValue: 80, min: 1, max: 100 },
+                { name: 'Region X', type: 'number', defaultValue: 0, min: 0, max: 9999 },
+                { name: 'Region Y', type: 'number', defaultValue: 0, min: 0, max: 9999 },
+                { name: 'Region Width', type: 'number', defaultValue: 0, min: 0, max: 9999 },
+                { name: 'Region Height', type: 'number', defaultValue: 0, min: 0, max: 9999 }
             ],
             dataOutputs: [
                 { name: 'X', type: 'number' },
                 { name: 'Y', type: 'number' }
             ]
         },
+        {
+            type: 'pixel_color',
+            name: 'Pixel Color',
+            description: 'Checks, or waits until, a pixel in a screen area matches a color. Executes the "Found" or "Not Found" path.',
+            execInputs: [{ name: 'exec' }],
+            execOutputs: [
+                { name: 'Found', class: 'found' },
+                { name: 'Not Found', class: 'not_found' }
+            ],
+            dataInputs: [
+                { name: 'Color', type: 'string', defaultValue: '#00ff00' },
+                { name: 'Tolerance', type: 'number', defaultValue: 10, min: 0, max: 255 },
+                { name: 'X', type: 'number', defaultValue: 0, min: 0, max: 9999 },
+                { name: 'Y', type: 'number', defaultValue: 0, min: 0, max: 9999 },
+                { name: 'Width', type: 'number', defaultValue: 1, min: 1, max: 9999 },
+                { name: 'Height', type: 'number', defaultValue: 1, min: 1, max: 9999 },
+                { name: 'Timeout', type: 'number', defaultValue: 10, min: 0, max: 99999, condition: 'Mode', conditionValue: 'wait' }
+            ],
+            params: [
+                { name: 'Mode', type: 'select', defaultValue: 'check', options: ['Check', 'Wait'] }
+            ],
+            dataOutputs: [
+                { name: 'Match X', type: 'number' },
+                { name: 'Match Y', type: 'number' }
+            ]
+        },
+        {
+            type: 'region_change',
+            name: 'Wait for Screen',
+            description: 'Waits until a screen area changes, or until it stops changing. Timeout is in seconds; 0 waits forever.',
+            execInputs: [{ name: 'exec' }],
+            execOutputs: [
+                { name: 'Done', class: 'found' },
+                { name: 'Timed Out', class: 'not_found' }
+            ],
+            dataInputs: [
+                { name: 'Threshold', type: 'number', defaultValue: 2, min: 0, max: 255 },
+                { name: 'Stable Time', type: 'number', defaultValue: 0.5, min: 0, max: 9999, condition: 'Wait For', conditionValue: 'stable' },
+                { name: 'Timeout', type: 'number', defaultValue: 10, min: 0, max: 99999 },
+                { name: 'Region X', type: 'number', defaultValue: 0, min: 0, max: 9999 },
+                { name: 'Region Y', type: 'number', defaultValue: 0, min: 0, max: 9999 },
+                { name: 'Region Width', type: 'number', defaultValue: 0, min: 0, max: 9999 },
+                { name: 'Region Height', type: 'number', defaultValue: 0, min: 0, max: 9999 }
+            ],
+            params: [
+                { name: 'Wait For', type: 'select', defaultValue: 'change', options: ['Change', 'Stable'] }
+            ],
+            dataOutputs: [
+                { name: 'Difference', type: 'number' }
+            ]
+        },
         {
             type: 'if_statement',
             name: 'If Statement',
@@ -250,6 +318,48 @@ document.addEventListener('DOMContentLoaded', () => {
                 { name: 'Condition', type: 'boolean' }
             ]
         },
+        {
+            type: 'call_macro',
+            name: 'Call Macro',
+            description: 'Runs another saved macro from its Start node, passing in values and returning its results.',
+            execInputs: [{ name: 'exec' }],
+            execOutputs: [{ name: 'exec' }],
+            dataInputs: [
+                { name: 'Number 1', type: 'number', defaultValue: 0 },
+                { name: 'Number 2', type: 'number', defaultValue: 0 },
+                { name: 'Text 1', type: 'string', defaultValue: '' },
+                { name: 'Text 2', type: 'string', defaultValue: '' }
+            ],
+            params: [
+                { name: 'Macro File', type: 'macro_selector' },
+                { name: 'Start Node', type: 'string', defaultValue: '' }
+            ],
+            dataOutputs: [
+                { name: 'Number Result', type: 'number' },
+                { name: 'Text Result', type: 'string' }
+            ]
+        },
+        {
+            type: 'macro_input',
+            name: 'Macro Inputs',
+            description: 'Provides the values passed in by the Call Macro node that called this macro.',
+            dataOutputs: [
+                { name: 'Number 1', type: 'number' },
+                { name: 'Number 2', type: 'number' },
+                { name: 'Text 1', type: 'string' },
+                { name: 'Text 2', type: 'string' }
+            ]
+        },
+        {
+            type: 'macro_return',
+            name: 'Return',
+            description: 'Ends this macro and hands its results back to the Call Macro node that called it.',
+            execInputs: [{ name: 'exec' }],
+            dataInputs: [
+                { name: 'Number Result', type: 'number', defaultValue: 0 },
+                { name: 'Text Result', type: 'string', defaultValue: '' }
+            ]
+        },
 
         // --- DATA & LOGIC NODES (no execution pins) ---
         {
@@ -314,6 +424,12 @@ document.addEventListener('DOMContentLoaded', () => {
         errorMessage.textContent = message;
         errorModal.classList.remove('modal-hidden');
     }
+    // Like showError, but for information the user asked for, so it ignores the "show errors" setting.
+    function showMessage(message) {
+        errorMessage.textContent = message;
+        errorModal.classList.remove('modal-hidden');
+    }
+
     function hideError() {
         errorModal.classList.add('modal-hidden');
     }
@@ -469,6 +585,20 @@ document.addEventListener('DOMContentLoaded', () => {
         return wrapper;
     }
 
+    function getImagePreview(filePath) {
+        if (!imagePreviews.has(filePath)) {
+            const preview = window.pywebview.api.get_image_preview(filePath);
+            // Don't keep failures, so a missing file can show up once it exists.
+            preview.then(dataUrl => { if (!dataUrl) imagePreviews.delete(filePath); });
+            imagePreviews.set(filePath, preview);
+        }
+        return imagePreviews.get(filePath);
+    }
+
+    function macroFileName(filePath) {
+        return filePath.split(/[\\/]/).pop();
+    }
+
     function createParamInput(paramInfo, nodeInfo, contentArea) {
         const wrapper = document.createElement('div');
         if (contentArea) {
@@ -542,7 +672,8 @@ document.addEventListener('DOMContentLoaded', () => {
                     const nodeEl = previewEl.closest('.canvas-node');
                     const filePath = await window.pywebview.api.open_image_dialog();
                     if (filePath) {
-                        const dataUrl = await window.pywebview.api.read_image_as_base64(filePath);
+                        imagePreviews.delete(filePath); // The file may have changed since it was last shown
+                        const dataUrl = await getImagePreview(filePath);
                         if (dataUrl) {
                             previewEl.classList.remove('error');
                             const img = document.createElement('img');
@@ -558,6 +689,22 @@ document.addEventListener('DOMContentLoaded', () => {
                     }
                 });
                 break;
+            case 'macro_selector':
+                inputElement = document.createElement('div');
+                inputElement.classList.add('macro-file-picker');
+                inputElement.textContent = 'Select Macro';
+                inputElement.addEventListener('click', async (e) => {
+                    const pickerEl = e.currentTarget;
+                    const nodeEl = pickerEl.closest('.canvas-node');
+                    const filePath = await window.pywebview.api.open_load_dialog();
+                    if (filePath && nodeEl) {
+                        nodeEl.dataset.macroPath = filePath;
+                        pickerEl.textContent = macroFileName(filePath);
+                        pickerEl.title = filePath;
+                        saveState();
+                    }
+                });
+                break;
             case 'select':
                 inputElement = document.createElement('select');
                 paramInfo.options.forEach(optionText => {
@@ -952,6 +1099,7 @@ document.addEventListener('DOMContentLoaded', () => {
         } else {
             pinMenuItem.textContent = 'Pin';
         }
+        document.getElementById('menu-estimate').style.display = activeNodeForMenu.dataset.nodeType === 'start' ? '' : 'none';
 
         contextMenu.style.left = `${e.clientX}px`;
         contextMenu.style.top = `${e.clientY}px`;
@@ -963,6 +1111,31 @@ document.addEventListener('DOMContentLoaded', () => {
         activeNodeForMenu = null;
     }
 
+    document.getElementById('menu-estimate').addEventListener('click', async () => {
+        if (!activeNodeForMenu) return;
+        const macroData = serializeMacro(activeNodeForMenu.id);
+        hideContextMenu();
+        const result = await window.pywebview.api.simulate_macro(macroData);
+        if (!result.success) {
+            showError(`Could not simulate the macro: ${result.error}`);
+            return;
+        }
+        let message = `Estimated duration: ${formatDuration(result.duration_ms)} (${result.action_count} input actions).`;
+        if (result.limit_reached) {
+            message += ' The simulation hit its limit (e.g. the macro loops forever), so the real run takes at least this long.';
+        }
+        showMessage(message);
+    });
+
+    function formatDuration(milliseconds) {
+        const totalSeconds = milliseconds / 1000;
+        if (totalSeconds < 60) return `${totalSeconds.toFixed(2)} s`;
+        const hours = Math.floor(totalSeconds / 3600);
+        const minutes = Math.floor((totalSeconds % 3600) / 60);
+        const seconds = Math.round(totalSeconds % 60);
+        return hours > 0 ? `${hours} h ${minutes} min ${seconds} s` : `${minutes} min ${seconds} s`;
+    }
+
     document.getElementById('menu-delete').addEventListener('click', () => {
         if (!activeNodeForMenu) return;
         activeNodeForMenu.querySelectorAll('.node-pin').forEach(pin => removeConnections(pin));
@@ -1021,6 +1194,15 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
             }
 
+            if (nodeType === 'call_macro' && activeNodeForMenu.dataset.macroPath) {
+                newNode.dataset.macroPath = activeNodeForMenu.dataset.macroPath;
+                const newPicker = newNode.querySelector('.macro-file-picker');
+                if (newPicker) {
+                    newPicker.textContent = macroFileName(newNode.dataset.macroPath);
+                    newPicker.title = newNode.dataset.macroPath;
+                }
+            }
+
 
             canvasContent.appendChild(newNode);
             newNode.querySelectorAll('.node-pin').forEach(pin => {
@@ -1302,6 +1484,7 @@ document.addEventListener('DOMContentLoaded', () => {
         document.body.classList.toggle('light-theme', appSettings.general.theme === 'light');
         themeSwitcher.textContent = appSettings.general.theme === 'light' ? 'Switch to Dark Theme' : 'Switch to Light Theme';
         disableErrorsCheckbox.checked = !appSettings.general.showErrors;
+        autosaveCheckbox.checked = appSettings.general.autosave;
         gridSnapCheckbox.checked = appSettings.canvas.snapToGrid;
         gridSnapSizeInput.value = appSettings.canvas.gridSnapSize;
         wireStyleSwitcher.value = appSettings.canvas.wireStyle;
@@ -1326,6 +1509,7 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 
     disableErrorsCheckbox.addEventListener('change', (e) => { appSettings.general.showErrors = !e.target.checked; });
+    autosaveCheckbox.addEventListener('change', (e) => { appSettings.general.autosave = e.target.checked; scheduleAutosave(); });
     emergencyStopRecorder.addEventListener('click', startKeyRecording);
     undoRecorder.addEventListener('click', startKeyRecording);
     redoRecorder.addEventListener('click', startKeyRecording);
@@ -1392,6 +1576,7 @@ document.addEventListener('DOMContentLoaded', () => {
             svgLayer.innerHTML = '';
             connections = [];
             panX = 0; panY = 0; scale = 1;
+            currentFilePath = null; // Never autosave a cleared canvas over the old file
             updateCanvasTransform();
             gatherAndRegisterHotkeys();
             saveState();
@@ -1403,7 +1588,9 @@ document.addEventListener('DOMContentLoaded', () => {
         if (!savePath) return;
         const canvasData = serializeCanvas();
         const result = await window.pywebview.api.save_file(savePath, canvasData);
-        if (!result.success) { showError(`Failed to save file: ${result.error}`); }
+        if (!result.success) { showError(`Failed to save file: ${result.error}`); return; }
+        currentFilePath = savePath;
+        persistedCanvas = canvasData;
     });
 
     importBtn.addEventListener('click', async () => {
@@ -1413,6 +1600,8 @@ document.addEventListener('DOMContentLoaded', () => {
         if (result.success) {
             try {
                 deserializeCanvas(result.data);
+                currentFilePath = loadPath;
+                persistedCanvas = serializeCanvas();
                 saveState(); // Save the imported state as the new initial state
             } catch (err) {
                 console.error("Error deserializing canvas:", err);
@@ -1423,6 +1612,26 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    recordBtn.addEventListener('click', async () => {
+        if (!recordBtn.classList.contains('recording')) {
+            const result = await window.pywebview.api.start_recording();
+            if (!result.success) { showError(`Failed to start recording: ${result.error}`); return; }
+            recordBtn.classList.add('recording');
+            recordBtn.title = 'Stop Recording';
+            return;
+        }
+        recordBtn.classList.remove('recording');
+        recordBtn.title = 'Record';
+        const result = await window.pywebview.api.stop_recording();
+        if (!result.success) { showError(`Recording failed: ${result.error}`); return; }
+        showConfirm("Replace the canvas with the recorded macro?", () => {
+            deserializeCanvas(result.data);
+            currentFilePath = null;
+            gatherAndRegisterHotkeys();
+            saveState();
+        });
+    });
+
     validateBtn.addEventListener('click', () => {
         const warnings = new Set();
         const allNodes = new Map();
@@ -1494,22 +1703,37 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 
     // --- MACRO EXECUTION & HOTKEYS ---
-    window.highlightNode = (nodeId) => {
-        const currentlyExecuting = document.querySelector('.canvas-node.executing');
-        if (currentlyExecuting) {
-            currentlyExecuting.classList.remove('executing');
+    // Receives a batch of trace events for one running macro. Each event is a node id,
+    // or null to clear that macro's highlight; only the latest state needs to be shown.
+    const tracedNodes = new Map(); // macro (start node) id -> highlighted node id
+    window.applyExecutionTrace = (macroId, events) => {
+        if (!events || events.length === 0) return;
+        const latest = events[events.length - 1];
+        const previous = tracedNodes.get(macroId);
+        if (latest === null) {
+            tracedNodes.delete(macroId);
+        } else {
+            tracedNodes.set(macroId, latest);
         }
 
-        const nodeToHighlight = document.getElementById(nodeId);
-        if (nodeToHighlight) {
-            nodeToHighlight.classList.add('executing');
+        const stillTraced = new Set(tracedNodes.values());
+        if (previous && !stillTraced.has(previous)) {
+            document.getElementById(previous)?.classList.remove('executing');
+        }
+        if (latest !== null) {
+            document.getElementById(latest)?.classList.add('executing');
         }
     };
 
-    window.clearNodeHighlights = () => {
-        document.querySelectorAll('.canvas-node.executing').forEach(node => {
-            node.classList.remove('executing');
-        });
+    // Receives run status updates for one macro, e.g. when the backend starts or
+    // stops throttling a loop that runs without input or waits.
+    window.applyMacroStatus = (macroId, status) => {
+        const startNode = document.getElementById(macroId);
+        if (!startNode || !status) return;
+        startNode.classList.toggle('throttled', !!status.throttled);
+        startNode.title = status.throttled
+            ? `A loop in this macro is running without input or waits (${status.executions_per_second} nodes/s), so it is being slowed down. Add a Delay to the loop.`
+            : '';
     };
 
     function gatherAndRegisterHotkeys() {
@@ -1534,31 +1758,47 @@ document.addEventListener('DOMContentLoaded', () => {
         if (appSettings.hotkeys.redo) hotkeys[appSettings.hotkeys.redo] = 'redo';
         
         window.pywebview.api.register_hotkeys(hotkeys);
+        prepareHotkeyMacros();
+    }
+
+    // Sends every hotkeyed macro to the backend after the canvas changes, so a hotkey
+    // can start its compiled macro without calling back into the editor. Several
+    // changes in the same task are sent once; unchanged macros are not recompiled.
+    let macroPreparationPending = false;
+    function prepareHotkeyMacros() {
+        if (macroPreparationPending) return;
+        macroPreparationPending = true;
+        setTimeout(() => {
+            macroPreparationPending = false;
+            const macros = [];
+            document.querySelectorAll('.canvas-node[data-node-type="start"]').forEach(nodeEl => {
+                const hotkeyInput = nodeEl.querySelector('.key-recorder-input');
+                if (hotkeyInput && hotkeyInput.dataset.pynputValue) {
+                    macros.push(serializeMacro(nodeEl.id));
+                }
+            });
+            window.pywebview.api.prepare_macros(macros);
+        }, 0);
     }
 
     function serializeMacro(startNodeId) {
-        const relevantNodes = new Set();
+        const relevantNodes = new Set([startNodeId]);
         const queue = [startNodeId];
-        
-        // Start traversal from the start node
-        if (!relevantNodes.has(startNodeId)) {
-            relevantNodes.add(startNodeId);
-        }
-        
+
+        // Index the wires by node once, so the traversal doesn't rescan them for every node.
+        const neighbours = new Map();
+        connections.forEach(conn => {
+            if (!neighbours.has(conn.startNodeId)) neighbours.set(conn.startNodeId, []);
+            if (!neighbours.has(conn.endNodeId)) neighbours.set(conn.endNodeId, []);
+            neighbours.get(conn.startNodeId).push(conn.endNodeId);
+            neighbours.get(conn.endNodeId).push(conn.startNodeId);
+        });
+
         let i = 0;
         while(i < queue.length) {
             const currentId = queue[i++];
-            
-            // Find all connections involving the current node
-            connections.forEach(conn => {
-                let otherNodeId = null;
-                if (conn.startNodeId === currentId) {
-                    otherNodeId = conn.endNodeId;
-                } else if (conn.endNodeId === currentId) {
-                    otherNodeId = conn.startNodeId;
-                }
-
-                if (otherNodeId && !relevantNodes.has(otherNodeId)) {
+            (neighbours.get(currentId) || []).forEach(otherNodeId => {
+                if (!relevantNodes.has(otherNodeId)) {
                     relevantNodes.add(otherNodeId);
                     queue.push(otherNodeId);
                 }
@@ -1665,6 +1905,9 @@ document.addEventListener('DOMContentLoaded', () => {
         if (nodeEl.dataset.imagePath) {
             nodeData.imagePath = nodeEl.dataset.imagePath;
         }
+        if (nodeEl.dataset.macroPath) {
+            nodeData.macroPath = nodeEl.dataset.macroPath;
+        }
 
         return nodeData;
     }
@@ -1728,7 +1971,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
                     if (nodeData.imagePath) {
                         const previewEl = newNode.querySelector('.image-preview');
-                        window.pywebview.api.read_image_as_base64(nodeData.imagePath).then(dataUrl => {
+                        getImagePreview(nodeData.imagePath).then(dataUrl => {
                             if (dataUrl && previewEl) {
                                 previewEl.classList.remove('error');
                                 const img = document.createElement('img');
@@ -1743,6 +1986,15 @@ document.addEventListener('DOMContentLoaded', () => {
                         });
                     }
 
+                    if (nodeData.macroPath) {
+                        newNode.dataset.macroPath = nodeData.macroPath;
+                        const pickerEl = newNode.querySelector('.macro-file-picker');
+                        if (pickerEl) {
+                            pickerEl.textContent = macroFileName(nodeData.macroPath);
+                            pickerEl.title = nodeData.macroPath;
+                        }
+                    }
+
                     canvasContent.appendChild(newNode);
                     newNode.querySelectorAll('.node-pin').forEach(pin => {
                         pin.addEventListener('mousedown', startWire);
@@ -1793,6 +2045,55 @@ document.addEventListener('DOMContentLoaded', () => {
         historyIndex = history.length - 1;
         updateUndoRedoButtons();
         updateMinimap();
+        scheduleAutosave();
+        prepareHotkeyMacros();
+    }
+
+    // --- Autosave ---
+    // Sends only what changed since the last write to the backend, which
+    // appends it to the file's journal instead of rewriting the whole file.
+    function diffCanvas(before, after) {
+        const changes = [];
+        // keyOf must match the backend: nodes by id, connections by the pins
+        // they join (connection ids come from Date.now() and can repeat).
+        const diffByKey = (oldItems, newItems, keyOf, putOp, removeOp, field, removal) => {
+            const oldByKey = new Map(oldItems.map(item => [keyOf(item), JSON.stringify(item)]));
+            const removed = new Map(oldItems.map(item => [keyOf(item), item]));
+            newItems.forEach(item => {
+                const key = keyOf(item);
+                if (oldByKey.get(key) !== JSON.stringify(item)) changes.push({ op: putOp, [field]: item });
+                removed.delete(key);
+            });
+            removed.forEach(item => changes.push({ op: removeOp, ...removal(item) }));
+        };
+        const connectionEnds = c => ({ startNodeId: c.startNodeId, startPinName: c.startPinName, endNodeId: c.endNodeId, endPinName: c.endPinName });
+        diffByKey(before.nodes, after.nodes, n => n.id, 'put_node', 'remove_node', 'node', n => ({ id: n.id }));
+        diffByKey(before.connections, after.connections, c => JSON.stringify(connectionEnds(c)),
+            'put_connection', 'remove_connection', 'connection', c => ({ connection: connectionEnds(c) }));
+        ['panX', 'panY', 'scale', 'nodeIdCounter'].forEach(key => {
+            if (before[key] !== after[key]) changes.push({ op: 'set', key: key, value: after[key] });
+        });
+        return changes;
+    }
+
+    function scheduleAutosave() {
+        if (!appSettings.general.autosave || !currentFilePath) return;
+        clearTimeout(autosaveTimer);
+        autosaveTimer = setTimeout(autosave, 1000);
+    }
+
+    async function autosave() {
+        const path = currentFilePath;
+        const canvasData = serializeCanvas();
+        if (!path || !persistedCanvas) return;
+        const changes = diffCanvas(persistedCanvas, canvasData);
+        if (changes.length === 0) return;
+        const result = await window.pywebview.api.append_file_changes(path, changes);
+        if (result.success) {
+            if (path === currentFilePath) persistedCanvas = canvasData;
+        } else {
+            showError(`Autosave failed: ${result.error}`);
+        }
     }
 
     function undo() {
@@ -1800,6 +2101,7 @@ document.addEventListener('DOMContentLoaded', () => {
             historyIndex--;
             deserializeCanvas(history[historyIndex]);
             updateUndoRedoButtons();
+            scheduleAutosave();
         }
     }
 
@@ -1808,6 +2110,7 @@ document.addEventListener('DOMContentLoaded', () => {
             historyIndex++;
             deserializeCanvas(history[historyIndex]);
             updateUndoRedoButtons();
+            scheduleAutosave();
         }
     }
 
@@ -1894,15 +2197,18 @@ document.addEventListener('DOMContentLoaded', () => {
             }, { once: true });
         }
         
-        // Check for updates on startup
-        const updateInfo = await window.pywebview.api.check_for_updates();
-        if (updateInfo && updateInfo.update_available) {
-            updateVersionSpan.textContent = updateInfo.latest_version;
-            updateDownloadBtn.onclick = () => {
-                window.pywebview.api.open_url(updateInfo.download_url);
-            };
-            updateModal.classList.remove('modal-hidden');
-        }
+        // Check for updates on startup. The backend answers from its cache right
+        // away and calls showUpdateNotice later if it had to ask GitHub.
+        window.showUpdateNotice = (updateInfo) => {
+            if (updateInfo && updateInfo.update_available) {
+                updateVersionSpan.textContent = updateInfo.latest_version;
+                updateDownloadBtn.onclick = () => {
+                    window.pywebview.api.open_url(updateInfo.download_url);
+                };
+                updateModal.classList.remove('modal-hidden');
+            }
+        };
+        window.showUpdateNotice(await window.pywebview.api.check_for_updates());
 
         updateDismissBtn.addEventListener('click', () => {
             updateModal.classList.add('modal-hidden');
@@ -0,0 +1,95 @@
+"""
+Runs a saved .macro file without starting the editor window.
+
+    python headless.py my-macro.macro
+    python headless.py my-macro.macro --start node-3 --stop-hotkey "<ctrl>+<alt>+q"
+
+Press Ctrl+C (or send SIGTERM) to stop a looping macro. Exits with 1 if the
+file can't be loaded or a node fails, and 0 otherwise.
+"""
+import argparse
+import signal
+import sys
+import threading
+
+from backend.capture import ScreenCapture
+from backend.executor import MacroRunner
+from backend.input import INPUT_BACKENDS, create_input_backend
+from backend.storage import MacroStorage, macro_from_canvas
+from backend.trace import LoggingTrace, NullTrace
+
+
+# --- Macro Loading ---
+def load_macro(path, start_node_id=None):
+    """
+    Loads a file written by Api.save_file and returns the macro data for one
+    of its Start nodes, as the editor would send it to Api.run_macro.
+    """
+    try:
+        return macro_from_canvas(MacroStorage().load(path), start_node_id)
+    except ValueError as e:
+        raise ValueError(f"{path}: {e}") from None
+
+
+def start_stop_hotkey(hotkey, runner):
+    """ Stops the runner when a global hotkey is pressed. Requires pynput. """
+    try:
+        from pynput import keyboard
+    except ImportError:
+        print("Warning: pynput is not installed. The stop hotkey will not work.")
+        return None
+    listener = keyboard.GlobalHotKeys({hotkey: runner.stop})
+    listener.start()
+    return listener
+
+
+# --- Entry Point ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a MacroBot .macro file without the editor.")
+    parser.add_argument('path', help="Path to a .macro file saved by the editor.")
+    parser.add_argument('--start', dest='start_node_id', help="Id of the Start node to run (needed if the file has several).")
+    parser.add_argument('--stop-hotkey', help="Global hotkey that stops the macro, in pynput format, e.g. '<ctrl>+<alt>+q'.")
+    parser.add_argument('--trace', action='store_true', help="Print every node as it executes.")
+    parser.add_argument('--input', choices=[name for name in INPUT_BACKENDS if name != 'recording'], default='pyautogui',
+                        help="Library used to send mouse and keyboard input.")
+    parser.add_argument('--capture-max-age', type=float, default=ScreenCapture.DEFAULT_MAX_AGE * 1000,
+                        help="Milliseconds a screen capture is shared between screen-reading nodes.")
+    args = parser.parse_args(argv)
+
+    try:
+        macro_data = load_macro(args.path, args.start_node_id)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    nodes = {node['id']: node for node in macro_data['nodes']}
+    trace = LoggingTrace(nodes) if args.trace else NullTrace()
+    runner = MacroRunner(macro_data, None, trace=trace, input_backend=create_input_backend(args.input),
+                         capture_max_age=args.capture_max_age / 1000)
+
+    # Signals only reach the main thread, so the macro runs on a worker
+    # while the main thread waits and relays Ctrl+C / SIGTERM as a stop.
+    def on_signal(signum, frame):
+        print("Stop requested.")
+        runner.stop()
+    signal.signal(signal.SIGINT, on_signal)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, on_signal)
+
+    listener = start_stop_hotkey(args.stop_hotkey, runner) if args.stop_hotkey else None
+
+    thread = threading.Thread(target=runner.run, daemon=True)
+    thread.start()
+    while thread.is_alive():
+        thread.join(0.2)
+
+    if listener:
+        listener.stop()
+    if args.trace:
+        print(f"Screen capture: {runner.capture.stats()}")
+    # Scheduled jobs see a failed run through the exit code.
+    return 1 if runner.error else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,29 +1,53 @@
+import time
+STARTUP_STARTED = time.perf_counter() # Taken before any other import, for the startup timings
+
 import webview
 import os
 import sys
-import base64
-import pyautogui
 import json
-import time
+import importlib.util
+import multiprocessing
 import threading
-import requests # Make sure to install this: pip install requests
 import webbrowser
-from packaging import version # Make sure to install this: pip install packaging
+from collections import deque
+from backend.hotkeys import HotkeyListener, latency_stats
+from backend.profiler import Profiler
+from backend.registry import RunnerRegistry
+from backend.storage import MacroStorage, write_json_atomic
+# pyautogui, requests, packaging, pynput and backend.executor (NumPy, Pillow)
+# are imported where they are first used, so they don't delay the window.
 
-# --- Hotkey Library Import ---
-try:
-    from pynput import keyboard
-    pynput_installed = True
-except ImportError:
-    pynput_installed = False
+# --- Hotkey Library Check ---
+pynput_installed = importlib.util.find_spec('pynput') is not None
 
 # --- Application Version ---
 APP_VERSION = "0.1.2" # Using a standard versioning scheme
+UPDATE_CHECK_URL = "https://api.github.com/repos/Hydro4100/MacroBot/releases/latest"
+UPDATE_CHECK_TTL = 24 * 60 * 60 # Seconds a successful update check is reused
 
 # --- Global State for Macro Execution ---
-macro_runner_instance = None
+runner_registry = RunnerRegistry() # Running macros, keyed by start node id
+profiling_enabled = False
+macro_profiles = {} # Profiler of the latest run, keyed by start node id
+macro_governors = {} # Loop governor of the latest run, keyed by start node id
+macro_captures = {} # Screen capture of the latest run, keyed by start node id
 hotkey_manager = None
+# Seconds from a hotkey firing to its runner being queued, by how the macro was found:
+# 'prepared' from the backend's cache, 'editor' serialized by the frontend on request.
+trigger_latencies = {'prepared': deque(maxlen=256), 'editor': deque(maxlen=256)}
+pending_triggers = {} # start node id -> when its hotkey was handed to the editor
 user_settings = {}
+settings_lock = threading.RLock() # The update check saves settings from a background thread
+macro_storage = MacroStorage() # Snapshot + journal files behind save_file/load_file
+BACKEND_SETTINGS = ('update_check',) # Settings kept by the backend, not sent back by the frontend
+update_check_lock = threading.Lock()
+update_check_thread = None
+startup_timings = {} # Milestone -> milliseconds since the process started
+asset_store = None # Created on first use; see get_asset_store
+input_recorder = None # Set while the user is recording a macro
+asset_store_lock = threading.Lock()
+macro_library = None # Created on first use; see get_macro_library
+macro_library_lock = threading.Lock()
 
 # --- Helper function to get a file path ---
 def get_path(relative_path, user_data=False):
@@ -51,365 +75,178 @@ def load_user_settings():
     global user_settings
     settings_path = get_path("settings.json", user_data=True)
     if os.path.exists(settings_path):
-        with open(settings_path, 'r') as f:
-            user_settings = json.load(f)
-    else:
-        # Default settings for a new user
-        user_settings = {"last_seen_version": "0.0.0"}
+        try:
+            with open(settings_path, 'r') as f:
+                user_settings = json.load(f)
+            return
+        except (OSError, ValueError) as e:
+            print(f"Could not read settings, using defaults: {e}")
+    # Default settings for a new user
+    user_settings = {"last_seen_version": "0.0.0"}
 
 def save_user_settings():
-    """ Saves user settings to a json file. """
+    """ Saves user settings to a json file, replacing it in one step. """
     settings_path = get_path("settings.json", user_data=True)
-    with open(settings_path, 'w') as f:
-        json.dump(user_settings, f, indent=4)
-
-# --- Macro Execution Engine ---
-class MacroRunner:
-    def __init__(self, macro_data, window):
-        self.macro_data = macro_data
-        self.window = window
-        self.is_running = False
-        self.nodes = {node['id']: node for node in macro_data['nodes']}
-        self.connections = macro_data['connections']
-        self.node_outputs = {} # Stores dynamic outputs from nodes like loop index
-
-    def stop(self):
-        self.is_running = False
-        self.window.evaluate_js('window.clearNodeHighlights()')
-        print("Macro execution stopped by user.")
-
-    def run(self):
-        # The entire run process is wrapped in a try...finally block
-        # to ensure cleanup happens and the global instance is cleared.
+    with settings_lock:
+        write_json_atomic(settings_path, user_settings, indent=4)
+
+# --- Image Assets ---
+def get_asset_store():
+    """ Returns the image asset store in the user data directory, creating it on first use. """
+    global asset_store
+    with asset_store_lock:
+        if asset_store is None:
+            from backend.assets import AssetStore
+            asset_store = AssetStore(get_path("assets", user_data=True))
+        return asset_store
+
+# --- Macro Library ---
+def get_macro_library():
+    """ Returns the macro library index in the user data directory, opening it on first use. """
+    global macro_library
+    with macro_library_lock:
+        if macro_library is None:
+            from backend.library import MacroLibrary
+            macro_library = MacroLibrary(get_path("library.db", user_data=True))
+        return macro_library
+
+def index_macro_file(path):
+    """ Refreshes one file's library entry in the background, e.g. after a save. """
+    def update():
         try:
-            self.is_running = True
-            print("Starting macro execution...")
-            self.window.evaluate_js('window.clearNodeHighlights()')
-            
-            start_node_id = self.macro_data.get('start_node_id')
-            if not start_node_id:
-                print("Error: No start_node_id provided.")
-                return
-
-            start_node = self.nodes.get(start_node_id)
-            if not start_node:
-                print(f"Error: Start node {start_node_id} not found.")
-                return
-                
-            should_loop = start_node.get('values', {}).get('Loop Continuously', False)
-
-            # If the macro is not set to loop, just run the execution path once.
-            if not should_loop:
-                self.execute_path(start_node_id)
-            else:
-                # If looping, continue executing the path until stopped.
-                while self.is_running:
-                    self.execute_path(start_node_id)
-                    # If the macro was stopped during execution, don't sleep.
-                    if self.is_running:
-                        time.sleep(0.1)
-
-        finally:
-            print("Macro execution finished.")
-            self.window.evaluate_js('window.clearNodeHighlights()')
-            global macro_runner_instance
-            macro_runner_instance = None
-    
-    def execute_path(self, start_node_id):
-        """ Executes a chain of nodes starting from a given node ID. """
-        current_node_id = start_node_id
-        while current_node_id and self.is_running:
-            node = self.nodes.get(current_node_id)
-            if not node:
-                print(f"Error: Node {current_node_id} not found in execution path.")
-                break
-
-            self.window.evaluate_js(f"window.highlightNode('{current_node_id}')")
-            
-            # The 'start' node doesn't have an action, it just directs flow.
-            # For all other nodes, execute their action and determine the next path.
-            next_pin_name = 'exec'
-            if node.get('type') != 'start':
-                next_pin_name = self.execute_node(node)
-            
-            time.sleep(0.05)
-
-            if not self.is_running:
-                break
-
-            # Find the next connection based on the output pin name from the executed node.
-            next_connection = next((c for c in self.connections if c['startNodeId'] == current_node_id and c['startPinName'] == next_pin_name and c['flow'] == 'exec'), None)
-            
-            if next_connection:
-                current_node_id = next_connection['endNodeId']
-            else:
-                # End of this execution path.
-                current_node_id = None
-
-    def get_input_value(self, current_node_id, pin_name, expected_type, default_value=None):
-        """
-        Gets the value for a data input pin, either from a connection or
-        from the node's default value.
-        """
-        # Find if this input pin is connected to another node's output.
-        connection = next((c for c in self.connections if c['endNodeId'] == current_node_id and c['endPinName'] == pin_name and c['flow'] == 'data'), None)
-
-        value = None
-        if connection:
-            # If connected, recursively evaluate the source node's output pin.
-            value = self.evaluate_output_pin(connection['startNodeId'], connection['startPinName'])
-        
-        # If not connected, or if the connected node returned None, use the default.
-        if value is None:
-            node = self.nodes.get(current_node_id)
-            value = node.get('values', {}).get(pin_name, default_value)
-
-
-        # Coerce the value to the type expected by the pin.
-        if value is None:
-            if expected_type == 'number': return 0
-            if expected_type == 'string': return ""
-            if expected_type == 'boolean': return False
-            return None
-
-        try:
-            if expected_type == 'number': return float(value)
-            if expected_type == 'string': return str(value)
-            if expected_type == 'boolean':
-                if isinstance(value, bool):
-                    return value
-                if isinstance(value, str):
-                    val_lower = value.strip().lower()
-                    if val_lower in ['true', '1', 't', 'y', 'yes']:
-                        return True
-                    if val_lower in ['false', '0', 'f', 'n', 'no']:
-                        return False
-                if isinstance(value, (int, float)):
-                    return value != 0
-                return False # Default to false if type is ambiguous
-            return value # Return original value if type not matched
-        except (ValueError, TypeError):
-            # Fallback to a sensible default if casting fails.
-            if expected_type == 'number': return 0
-            if expected_type == 'string': return ""
-            if expected_type == 'boolean': return False
+            get_macro_library().update_file(path)
+        except Exception as e:
+            print(f"Failed to index {path}: {e}")
+    threading.Thread(target=update, daemon=True).start()
+
+# --- Startup Timing ---
+def mark_startup(milestone):
+    """ Records how long after launch a startup milestone was reached. """
+    startup_timings[milestone] = (time.perf_counter() - STARTUP_STARTED) * 1000
+    print(f"Startup: {milestone} after {startup_timings[milestone]:.0f} ms")
+
+# --- Update Check ---
+def update_info(latest_version_str, download_url):
+    """ Compares a release version with this build's version. """
+    from packaging import version # Make sure to install this: pip install packaging
+    if version.parse(latest_version_str) > version.parse(APP_VERSION):
+        return {
+            "update_available": True,
+            "latest_version": latest_version_str,
+            "download_url": download_url
+        }
+    return {"update_available": False}
+
+def cached_update_check():
+    """ Returns the cached update check result, or None if there is none or it has expired. """
+    cached = user_settings.get('update_check')
+    if not cached or time.time() - cached.get('checked_at', 0) > UPDATE_CHECK_TTL:
         return None
-
-    def evaluate_output_pin(self, node_id, pin_name):
-        """
-        Evaluates the value of a data output pin. This is used for data nodes
-        (like Math, Compare) and for nodes that generate data during execution (like Loops).
-        """
-        node = self.nodes.get(node_id)
-        if not node: return None
-        node_type = node.get('type')
-
-        # Check for dynamic data generated by an execution node (e.g., loop index).
-        if node_id in self.node_outputs and pin_name in self.node_outputs[node_id]:
-            return self.node_outputs[node_id][pin_name]
-
-        # Handle pure data nodes that just calculate or provide a value.
-        if node_type == 'number_literal':
-            return self.get_input_value(node_id, 'value', 'number', 0)
-        
-        elif node_type == 'string_literal':
-            return self.get_input_value(node_id, 'value', 'string', "")
-
-        elif node_type == 'math':
-            values = node.get('values', {})
-            val_a = self.get_input_value(node_id, 'A', 'number', 0)
-            val_b = self.get_input_value(node_id, 'B', 'number', 0)
-            operator = values.get('Operator', 'add')
-            if operator == 'add':
-                return val_a + val_b
-            elif operator == 'subtract':
-                return val_a - val_b
-            elif operator == 'multiply':
-                return val_a * val_b
-            elif operator == 'divide':
-                return val_a / val_b if val_b != 0 else 0
-            return 0 # Default return for math node
-        
-        elif node_type == 'compare':
-            values = node.get('values', {})
-            op_type = values.get('Type', 'number')
-            operator = values.get('Operator', '==').strip()
-            result = False # Default to False
-
-            try:
-                if op_type == 'number':
-                    val_a = self.get_input_value(node_id, 'A', 'number', 0)
-                    val_b = self.get_input_value(node_id, 'B', 'number', 0)
-                    
-                    if operator == '==': result = (val_a == val_b)
-                    elif operator == '!=': result = (val_a != val_b)
-                    elif operator == '>': result = (val_a > val_b)
-                    elif operator == '<': result = (val_a < val_b)
-                    elif operator == '>=': result = (val_a >= val_b)
-                    elif operator == '<=': result = (val_a <= val_b)
-                
-                elif op_type == 'string':
-                    val_a = self.get_input_value(node_id, 'A', 'string', "")
-                    val_b = self.get_input_value(node_id, 'B', 'string', "")
-                    
-                    if operator == '==': result = (val_a == val_b)
-                    elif operator == '!=': result = (val_a != val_b)
-                    elif operator == 'contains': result = (val_b in val_a)
-                    elif operator == 'starts_with': result = val_a.startswith(val_b)
-                    elif operator == 'ends_with': result = val_a.endswith(val_b)
-            
-            except Exception as e:
-                print(f"Error during comparison in node {node_id}: {e}")
-                return False # Explicitly return False on error
-            
-            return result
-        
+    try:
+        # Compared again on every read, so an installed update clears the notice.
+        return update_info(cached['latest_version'], cached.get('download_url'))
+    except Exception:
         return None
 
-    def execute_node(self, node):
-        node_type = node.get('type')
-        values = node.get('values', {})
-        node_id = node.get('id')
-        print(f"Executing node: {node_id} ({node_type})")
-        
-        next_exec_pin = 'exec' # Default for simple nodes
-
-        try:
-            if not self.is_running: return None
-
-            if node_type == 'delay':
-                duration = self.get_input_value(node_id, 'Duration', 'number', 1)
-                unit = values.get('Unit', 'seconds')
-                if unit == 'milliseconds':
-                    duration /= 1000.0
-                elif unit == 'minutes':
-                    duration *= 60
-                
-                end_time = time.time() + duration
-                while time.time() < end_time and self.is_running:
-                    time.sleep(0.1)
-
-            elif node_type == 'mouse_click':
-                pyautogui.click(
-                    button=values.get('Button', 'left').lower(),
-                    clicks=2 if values.get('Action') == 'double_click' else 1,
-                    interval=0.1
-                )
-
-            elif node_type == 'mouse_move':
-                x_pos = self.get_input_value(node_id, 'X', 'number', 0)
-                y_pos = self.get_input_value(node_id, 'Y', 'number', 0)
-                duration = self.get_input_value(node_id, 'Duration', 'number', 0.25)
-                unit = values.get('Unit', 'seconds')
-                if unit == 'milliseconds':
-                    duration /= 1000.0
-                
-                pyautogui.moveTo(x=int(x_pos), y=int(y_pos), duration=duration)
-            
-            elif node_type == 'key_press':
-                key_info = values.get('Key', {})
-                pynput_str = key_info.get('pynput', '')
-                if not pynput_str:
-                    return next_exec_pin
-
-                if '+' not in pynput_str:
-                    key_to_press = pynput_str.replace('<', '').replace('>', '')
-                    pyautogui.press(key_to_press)
-                else:
-                    keys = pynput_str.replace('<', '').replace('>', '').split('+')
-                    pyautogui.hotkey(*keys)
-            
-            elif node_type == 'type_string':
-                text_to_type = self.get_input_value(node_id, 'Text', 'string', "")
-                delay = self.get_input_value(node_id, 'Delay', 'number', 50)
-                unit = values.get('Unit', 'milliseconds')
-                if unit == 'milliseconds':
-                    delay /= 1000.0
-                
-                pyautogui.typewrite(text_to_type, interval=delay)
-
-            elif node_type == 'loop': # For Loop
-                iterations = int(self.get_input_value(node_id, 'Iterations', 'number', 5))
-                loop_body_conn = next((c for c in self.connections if c['startNodeId'] == node_id and c['startPinName'] == 'Loop Body'), None)
-
-                if loop_body_conn:
-                    for i in range(iterations):
-                        if not self.is_running: break
-                        # Store the current index so it can be accessed by other nodes.
-                        self.node_outputs[node_id] = {'Index': i}
-                        # Execute the entire path connected to the 'Loop Body' pin.
-                        self.execute_path(loop_body_conn['endNodeId'])
-                
-                # After the loop is done, the next path to follow is 'Completed'.
-                next_exec_pin = 'Completed'
-
-            elif node_type == 'while_loop':
-                loop_body_conn = next((c for c in self.connections if c['startNodeId'] == node_id and c['startPinName'] == 'Loop Body'), None)
-                
-                if loop_body_conn:
-                    # Loop as long as the condition is true and the macro is running.
-                    while self.get_input_value(node_id, 'Condition', 'boolean', False) and self.is_running:
-                        self.execute_path(loop_body_conn['endNodeId'])
-
-                next_exec_pin = 'Completed'
-            
-            elif node_type == 'if_statement':
-                condition = self.get_input_value(node_id, 'Condition', 'boolean', False)
-                if condition:
-                    next_exec_pin = 'True'
-                else:
-                    next_exec_pin = 'False'
-
-        except Exception as e:
-            print(f"Error executing node {node_id}: {e}")
-            self.stop()
-
-        return next_exec_pin
-
+def fetch_latest_release(window):
+    """
+    Asks GitHub for the latest release on a background thread, caches the
+    answer in the settings file and tells the frontend if there is an update.
+    """
+    import requests # Make sure to install this: pip install requests
+    try:
+        response = requests.get(UPDATE_CHECK_URL, timeout=5)
+        response.raise_for_status()  # Raise an exception for bad status codes
+
+        latest_release = response.json()
+        latest_version_str = latest_release.get('tag_name', 'v0.0.0').lstrip('v')
+        download_url = latest_release.get('html_url')
+        result = update_info(latest_version_str, download_url)
+    except requests.exceptions.RequestException as e:
+        print(f"Update check failed: {e}")
+        return
+    except Exception as e:
+        print(f"An unexpected error occurred during update check: {e}")
+        return
+
+    # Failures aren't cached, so the next launch tries again.
+    try:
+        with settings_lock:
+            user_settings['update_check'] = {
+                'checked_at': time.time(),
+                'latest_version': latest_version_str,
+                'download_url': download_url,
+            }
+            save_user_settings()
+    except Exception as e:
+        print(f"Failed to cache update check: {e}")
+
+    if result['update_available'] and window:
+        window.evaluate_js(f"window.showUpdateNotice({json.dumps(result)})")
 
 # --- Hotkey Management ---
 class HotkeyManager:
     def __init__(self, window):
         self.window = window
-        self.listener = None
-        self.lock = threading.Lock()
+        self.listener = HotkeyListener(self.dispatch)
 
-    def update_and_restart_listener(self, hotkey_config):
+    def start(self):
         # Do nothing if pynput is not installed
         if not pynput_installed:
             return
+        self.listener.start()
 
-        with self.lock:
-            if self.listener:
-                self.listener.stop()
-
-            hotkeys_to_listen = {}
-            for hotkey_str, action in hotkey_config.items():
-                def on_activate(act=action):
-                    # Define the work to be done in a separate function
-                    def work():
-                        if act == 'emergency_stop':
-                            global macro_runner_instance
-                            if macro_runner_instance and macro_runner_instance.is_running:
-                                macro_runner_instance.stop()
-                                print("Emergency stop activated.")
-                        else:
-                            # Call back to the frontend
-                            js_code = f"window.triggerMacroByHotkey('{act}')"
-                            self.window.evaluate_js(js_code)
-                    
-                    # Run the work in a new thread to ensure the listener doesn't block
-                    threading.Thread(target=work, daemon=True).start()
-
-                hotkeys_to_listen[hotkey_str] = on_activate
-            
-            if hotkeys_to_listen:
-                self.listener = keyboard.GlobalHotKeys(hotkeys_to_listen)
-                self.listener.start()
-                print(f"Hotkey listener started with: {list(hotkeys_to_listen.keys())}")
-            else:
-                self.listener = None
-                print("No hotkeys to listen for. Listener stopped.")
+    def update_hotkeys(self, hotkey_config):
+        """ Swaps in a new hotkey table without restarting the listener. """
+        if pynput_installed:
+            self.listener.update(hotkey_config)
+
+    def dispatch(self, action):
+        """ Runs on the listener's worker pool when a hotkey fires. """
+        triggered = time.perf_counter()
+        if action == 'emergency_stop':
+            if runner_registry.stop_all():
+                print("Emergency stop activated.")
+            return
+
+        # Macros the editor has prepared start without a round-trip through JS.
+        from backend.executor import prepared_macros
+        prepared = prepared_macros.get(action)
+        if prepared:
+            macro_data, plan = prepared
+            toggle_macro(action, macro_data, plan)
+            trigger_latencies['prepared'].append(time.perf_counter() - triggered)
+            return
+
+        # Otherwise (undo/redo, or a macro not prepared yet) call back to the frontend.
+        pending_triggers[action] = triggered
+        js_code = f"window.triggerMacroByHotkey('{action}')"
+        self.window.evaluate_js(js_code)
+
+
+def toggle_macro(start_node_id, macro_data, plan=None):
+    """ Starts a macro, or stops it if it is already running. Other macros keep running. """
+    if runner_registry.stop(start_node_id):
+        print("Macro toggled off.")
+        return {'success': True, 'action': 'stopped'}
+
+    from backend.capture import ScreenCapture
+    from backend.executor import MacroRunner
+    window = webview.windows[0]
+    profiler = Profiler() if profiling_enabled else None
+    # How long a screen frame is shared between nodes, in ms (settings.json).
+    capture_max_age = user_settings.get('capture_max_age_ms', ScreenCapture.DEFAULT_MAX_AGE * 1000) / 1000
+    runner = MacroRunner(macro_data, window, profiler=profiler, plan=plan, capture_max_age=capture_max_age)
+    if profiler:
+        macro_profiles[start_node_id] = profiler
+    macro_governors[start_node_id] = runner.governor
+    macro_captures[start_node_id] = runner.capture
+    error = runner_registry.start(start_node_id, runner)
+    if error:
+        print(error)
+        return {'success': False, 'error': error}
+
+    return {'success': True, 'action': 'started'}
 
 
 # --- Main Application Window ---
@@ -425,8 +262,13 @@ class Api:
     def save_user_settings(self, settings):
         """ Receives settings from JS and saves them. """
         global user_settings
-        user_settings = settings
-        save_user_settings()
+        with settings_lock:
+            # The frontend only knows the settings it was given at startup.
+            for key in BACKEND_SETTINGS:
+                if key in user_settings:
+                    settings[key] = user_settings[key]
+            user_settings = settings
+            save_user_settings()
         return {'success': True}
 
     def open_load_dialog(self):
@@ -444,72 +286,212 @@ class Api:
         result = window.create_file_dialog(webview.OPEN_DIALOG, allow_multiple=False, file_types=('Image Files (*.png;*.jpg;*.jpeg)',))
         return result[0] if result else None
 
-    def read_image_as_base64(self, file_path):
+    def get_image_preview(self, file_path):
+        """ Returns a small cached thumbnail of an image as a data URL, for node previews. """
         if not file_path or not os.path.exists(file_path): return None
         try:
-            ext = os.path.splitext(file_path)[1].lower()
-            mime_type = {'.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg'}.get(ext, 'application/octet-stream')
-            with open(file_path, "rb") as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-                return f"data:{mime_type};base64,{encoded_string}"
+            return get_asset_store().preview(file_path)
         except Exception as e:
-            print(f"Error reading image file: {e}")
+            print(f"Error creating image preview: {e}")
             return None
 
+    def start_recording(self):
+        """ Starts recording global mouse and keyboard input. """
+        global input_recorder
+        if not pynput_installed:
+            return {'success': False, 'error': 'Recording needs pynput: pip install pynput'}
+        if input_recorder and input_recorder.is_recording:
+            return {'success': False, 'error': 'Already recording.'}
+        from backend.recorder import InputRecorder
+        input_recorder = InputRecorder()
+        input_recorder.start()
+        return {'success': True}
+
+    def stop_recording(self):
+        """ Stops recording and returns the recorded actions as a canvas, like load_file. """
+        global input_recorder
+        if not input_recorder or not input_recorder.is_recording:
+            return {'success': False, 'error': 'Not recording.'}
+        from backend.recorder import build_macro
+        buffer = input_recorder.stop()
+        input_recorder = None
+        buffer.drop_last_click() # The click on the editor's stop button
+        try:
+            data = build_macro(buffer)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        print(f"Recorded {len(buffer)} events ({buffer.nbytes() // 1024} KB) into {len(data['nodes'])} nodes.")
+        return {'success': True, 'data': data}
+
     def get_mouse_position(self):
         try:
+            import pyautogui
             x, y = pyautogui.position()
             return {'x': x, 'y': y}
         except Exception as e:
             return None
 
     def save_file(self, path, data):
+        """ Writes the whole canvas atomically and clears the file's autosave journal. """
         try:
-            with open(path, 'w') as f: json.dump(data, f, indent=4)
+            macro_storage.save(path, data)
+            index_macro_file(path)
+            return {'success': True}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def append_file_changes(self, path, changes):
+        """ Autosave: journals a small list of canvas changes next to a saved file. """
+        try:
+            macro_storage.append(path, changes)
             return {'success': True}
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
     def load_file(self, path):
+        """ Loads a saved canvas with any journaled autosave changes replayed. """
         try:
-            with open(path, 'r') as f: data = json.load(f)
+            data = macro_storage.load(path)
+            index_macro_file(path)
             return {'success': True, 'data': data}
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def add_library_folder(self):
+        """ Asks for a folder, adds it to the macro library and indexes it. """
+        window = webview.windows[0]
+        result = window.create_file_dialog(webview.FOLDER_DIALOG)
+        if not result:
+            return {'success': False, 'error': 'No folder selected.'}
+        return self.scan_library([result[0]])
+
+    def remove_library_folder(self, folder):
+        get_macro_library().remove_root(folder)
+        return {'success': True}
+
+    def scan_library(self, folders=None):
+        """ Brings the library index up to date, re-reading only files that changed. """
+        try:
+            library = get_macro_library()
+            stats = library.scan(folders or ())
+            return {'success': True, 'folders': library.roots(), **stats}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def get_library_files(self):
+        """ Returns every indexed macro file. """
+        return get_macro_library().files()
+
+    def find_macros_by_hotkey(self, hotkey):
+        """ Returns the Start nodes in the library bound to a hotkey. """
+        return get_macro_library().find_by_hotkey(hotkey)
+
+    def find_macros_by_image(self, image):
+        """ Returns the library files that use an image (a path or a file name). """
+        return get_macro_library().find_by_image(image)
+
+    def find_macros_by_node_type(self, node_type):
+        """ Returns the library files that contain a node type. """
+        return get_macro_library().find_by_node_type(node_type)
+
+    def get_library_hotkeys(self):
+        """ Returns every hotkey bound in the library and how many Start nodes use it. """
+        return get_macro_library().hotkeys()
+
     def register_hotkeys(self, hotkeys):
         """ Receives hotkey configuration from JS and updates the listener. """
-        global hotkey_manager
         if hotkey_manager:
-            # Run the listener update in a separate thread to avoid blocking
-            threading.Thread(target=hotkey_manager.update_and_restart_listener, args=(hotkeys,)).start()
+            # Only hands over the table; the listener applies it in the background.
+            hotkey_manager.update_hotkeys(hotkeys)
         return {'success': True}
 
+    def get_hotkey_latency(self):
+        """ Returns how long recent hotkeys took from key press to dispatch, in ms. """
+        if not hotkey_manager:
+            return {'count': 0}
+        return hotkey_manager.listener.latency_stats()
+
     def run_macro(self, macro_data):
         """ Toggles a macro's execution. Starts it if not running, stops it if it is. """
-        global macro_runner_instance
-        
-        # If a macro is currently running, stop it.
-        if macro_runner_instance and macro_runner_instance.is_running:
-            # Optional: Check if it's the same macro being triggered.
-            # This prevents one hotkey from stopping a different macro.
-            if macro_runner_instance.macro_data.get('start_node_id') == macro_data.get('start_node_id'):
-                macro_runner_instance.stop()
-                print("Macro toggled off.")
-                return {'success': True, 'action': 'stopped'}
-            else:
-                print("Another macro is already running. Stop it before starting a new one.")
-                return {'success': False, 'error': 'Another macro is already running.'}
-
-        # If no macro is running, start a new one.
-        window = webview.windows[0]
-        runner = MacroRunner(macro_data, window)
-        macro_runner_instance = runner
-        
-        thread = threading.Thread(target=runner.run, daemon=True)
-        thread.start()
-        
-        return {'success': True, 'action': 'started'}
+        from backend.executor import prepared_macros
+        start_node_id = macro_data.get('start_node_id')
+        result = toggle_macro(start_node_id, macro_data, prepared_macros.prepare(macro_data))
+        triggered = pending_triggers.pop(start_node_id, None)
+        if triggered is not None:
+            trigger_latencies['editor'].append(time.perf_counter() - triggered)
+        return result
+
+    def prepare_macros(self, macros):
+        """
+        Receives every hotkeyed macro on the canvas whenever it changes. Only
+        macros whose content changed are compiled again.
+        """
+        from backend.executor import prepared_macros
+        return {'success': True, **prepared_macros.update(macros)}
+
+    def get_trigger_latency(self):
+        """
+        Returns hotkey-to-start latency in ms for macros started from the
+        backend's prepared cache and for those the editor had to serialize.
+        """
+        return {path: latency_stats(list(samples)) for path, samples in trigger_latencies.items()}
+
+    def simulate_macro(self, macro_data):
+        """
+        Dry-runs a macro on a virtual clock without sending any input. Returns
+        its projected duration and the timed list of actions it would send.
+        """
+        from backend.simulator import simulate_macro
+        try:
+            return {'success': True, **simulate_macro(macro_data)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def stop_macro(self, start_node_id):
+        """ Stops the macro started from the given Start node. """
+        if runner_registry.stop(start_node_id):
+            return {'success': True}
+        return {'success': False, 'error': 'That macro is not running.'}
+
+    def stop_all_macros(self):
+        """ Stops every running macro. """
+        return {'success': True, 'stopped': runner_registry.stop_all()}
+
+    def get_running_macros(self):
+        """ Returns the start node ids of all running macros. """
+        return runner_registry.running_ids()
+
+    def get_execution_stats(self, start_node_id):
+        """ Returns node execution, loop throttling and screen capture counters of a macro's latest run. """
+        governor = macro_governors.get(start_node_id)
+        if not governor:
+            return {'success': False, 'error': 'This macro has not run yet.'}
+        return {'success': True, 'stats': governor.stats(), 'capture': macro_captures[start_node_id].stats(),
+                'running': runner_registry.get(start_node_id) is not None}
+
+    def set_profiling(self, enabled):
+        """ Turns per-node profiling on or off for macros started from now on. """
+        global profiling_enabled
+        profiling_enabled = bool(enabled)
+        return {'success': True}
+
+    def get_macro_profile(self, start_node_id):
+        """ Returns per-node and per-type timings of a macro's latest profiled run. """
+        profiler = macro_profiles.get(start_node_id)
+        if not profiler:
+            return {'success': False, 'error': 'No profile recorded for this macro.'}
+        return {'success': True, 'profile': profiler.summary()}
+
+    def export_macro_profile(self, start_node_id, path):
+        """ Writes a macro's latest profiled run as a Chrome trace-event file. """
+        profiler = macro_profiles.get(start_node_id)
+        if not profiler:
+            return {'success': False, 'error': 'No profile recorded for this macro.'}
+        try:
+            profiler.export_chrome_trace(path)
+            return {'success': True}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
 
     def open_url(self, url):
         """ Opens a URL in the user's default web browser. """
@@ -521,35 +503,32 @@ class Api:
             return {'success': False, 'error': str(e)}
 
     def check_for_updates(self):
-        """ Checks GitHub for the latest release version. """
-        repo_url = "https://api.github.com/repos/Hydro4100/MacroBot/releases/latest"
-        try:
-            response = requests.get(repo_url, timeout=5)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            
-            latest_release = response.json()
-            latest_version_str = latest_release.get('tag_name', 'v0.0.0').lstrip('v')
-            
-            # Use the 'packaging' library for robust version comparison
-            if version.parse(latest_version_str) > version.parse(APP_VERSION):
-                return {
-                    "update_available": True,
-                    "latest_version": latest_version_str,
-                    "download_url": latest_release.get('html_url')
-                }
-            else:
-                return {"update_available": False}
-
-        except requests.exceptions.RequestException as e:
-            print(f"Update check failed: {e}")
-            return {"update_available": False, "error": "Could not connect to GitHub to check for updates."}
-        except Exception as e:
-            print(f"An unexpected error occurred during update check: {e}")
-            return {"update_available": False, "error": "An unexpected error occurred."}
+        """
+        Returns the cached update check result straight away. If it is missing
+        or stale, GitHub is asked in the background and the frontend is told
+        through window.showUpdateNotice when a newer release exists.
+        """
+        global update_check_thread
+        cached = cached_update_check()
+        if cached is not None:
+            return cached
+
+        with update_check_lock:
+            if update_check_thread is None or not update_check_thread.is_alive():
+                window = webview.windows[0] if webview.windows else None
+                update_check_thread = threading.Thread(target=fetch_latest_release, args=(window,), daemon=True)
+                update_check_thread.start()
+        return {"update_available": False, "pending": True}
+
+    def get_startup_timings(self):
+        """ Returns how long each startup milestone took to reach, in ms since launch. """
+        return startup_timings
 
 
 # --- Entry Point ---
 if __name__ == '__main__':
+    multiprocessing.freeze_support() # The library indexer's worker processes start through here when frozen
+    mark_startup('imports')
     load_user_settings()
     api = Api()
     # When running from the script, the frontend path is relative
@@ -567,10 +546,14 @@ if __name__ == '__main__':
         background_color='#1a1b26'
     )
 
+    # Created up front so hotkeys the frontend registers early are kept until
+    # the listener starts.
+    hotkey_manager = HotkeyManager(window)
+
     def on_loaded():
-        global hotkey_manager
+        mark_startup('window loaded')
         if pynput_installed:
-            hotkey_manager = HotkeyManager(window)
+            hotkey_manager.start()
         else:
             print("Warning: pynput is not installed. Hotkeys will not work.")
             print("Install it with: pip install pynput")
@@ -578,5 +561,8 @@ if __name__ == '__main__':
         # Start maximized correctly
         window.maximize()
 
+        # Warm the macro engine's heavy imports while the user looks at the editor.
+        threading.Thread(target=importlib.import_module, args=('backend.executor',), daemon=True).start()
+
     window.events.loaded += on_loaded
     webview.start(debug=False)
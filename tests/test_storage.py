@@ -0,0 +1,42 @@
+import json
+
+from backend.storage import MacroStorage
+
+
+def wire(conn_id, start, end, pin='exec'):
+    return {'id': conn_id, 'startNodeId': start, 'startPinName': pin, 'endNodeId': end, 'endPinName': 'exec', 'flow': 'exec', 'wire': None}
+
+
+def canvas():
+    nodes = [{'id': f"node-{i}", 'type': 'delay', 'values': {}} for i in range(3)]
+    # The editor gives wires created in the same millisecond the same id.
+    return {'nodes': nodes, 'connections': [wire('conn-1', 'node-0', 'node-1'), wire('conn-1', 'node-1', 'node-2')],
+            'panX': 0, 'panY': 0, 'scale': 1, 'nodeIdCounter': 3}
+
+
+def test_load_keeps_connections_that_share_an_id(tmp_path):
+    path = str(tmp_path / 'a.macro')
+    with open(path, 'w') as f:
+        json.dump(canvas(), f)
+
+    assert MacroStorage().load(path) == canvas()
+
+
+def test_journal_replays_onto_snapshot(tmp_path):
+    path = str(tmp_path / 'a.macro')
+    storage = MacroStorage()
+    storage.save(path, canvas())
+    storage.append(path, [
+        {'op': 'remove_connection', 'connection': {'startNodeId': 'node-0', 'startPinName': 'exec', 'endNodeId': 'node-1', 'endPinName': 'exec'}},
+        {'op': 'put_connection', 'connection': wire('conn-1', 'node-0', 'node-2')},
+        {'op': 'put_node', 'node': {'id': 'node-3', 'type': 'delay', 'values': {}}},
+        {'op': 'set', 'key': 'nodeIdCounter', 'value': 4},
+    ])
+
+    loaded = MacroStorage().load(path)
+    assert [(c['startNodeId'], c['endNodeId']) for c in loaded['connections']] == [('node-1', 'node-2'), ('node-0', 'node-2')]
+    assert [n['id'] for n in loaded['nodes']] == ['node-0', 'node-1', 'node-2', 'node-3']
+    assert loaded['nodeIdCounter'] == 4
+
+    storage.compact(path)
+    assert MacroStorage().load(path) == loaded